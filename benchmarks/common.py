@@ -0,0 +1,41 @@
+"""
+Helpers shared by the benchmark modules.
+"""
+import time
+
+import numpy as np
+
+from environment.rl_environment import Environment
+
+
+def make_environment(board_size, density=0.1, seed=0) -> Environment:
+    """
+    Corner-to-corner board with a seeded, solvable obstacle layout, so every run measures the same board.
+    """
+    rows, cols = board_size
+    env = Environment(board_size, int(rows * cols * density), (0, 0), (rows - 1, cols - 1), obstacles=set())
+    env.obstacles = env.generate_obstacles(np.random.default_rng(seed))
+    return env
+
+
+def metric(name, value, unit, higher_is_better=True, budget=None) -> dict:
+    """
+    One measured number as it is written to the results JSON and compared against the baseline.
+    A budget is an absolute limit the value must not fall below (or exceed, when lower is better).
+    """
+    entry = {"name": name, "value": value, "unit": unit, "higher_is_better": higher_is_better}
+    if budget is not None:
+        entry["budget"] = budget
+    return entry
+
+
+def best_time(function, repeats):
+    """
+    Fastest of repeats calls to function, in seconds; the minimum is the least noisy estimate.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
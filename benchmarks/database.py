@@ -0,0 +1,57 @@
+"""
+Bulk insert throughput and environment-listing latency of DatabaseManager as the results table grows.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import best_time, metric
+from database.db_manager import DatabaseManager
+from environment.generator import generate_environments
+
+USERNAME = "benchmark"
+RESULT_COUNTS = (1_000, 10_000, 100_000)
+
+
+def run(environment_count=1000, result_counts=RESULT_COUNTS, repeats=20, seed=0) -> list:
+    metrics = []
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = DatabaseManager(os.path.join(directory, "benchmark.db"))
+        try:
+            db_manager.add_user(USERNAME, "benchmark")
+            layouts = generate_environments(environment_count, seed=seed, processes=1)
+            started = time.perf_counter()
+            db_manager.store_layouts(layouts, USERNAME)
+            metrics.append(metric("database/store_layouts", len(layouts) / (time.perf_counter() - started),
+                                  "rows/sec"))
+            environment_ids = [row.environment_id for row in db_manager.get_environments(USERNAME)]
+
+            stored = 0
+            for result_count in result_counts:
+                boards = rng.choice(environment_ids, result_count - stored).tolist()
+                steps = rng.integers(1, 200, len(boards)).tolist()
+                results = [(board, step, 1, USERNAME, "q_learning", "{}", 0.0) for board, step in zip(boards, steps)]
+                started = time.perf_counter()
+                db_manager.store_results(results)
+                metrics.append(metric(f"database/store_results/{result_count}_results",
+                                      len(results) / (time.perf_counter() - started), "rows/sec"))
+                stored = result_count
+
+                seconds = best_time(lambda: db_manager.get_environments(username=USERNAME), repeats)
+                metrics.append(metric(f"database/get_environments/{result_count}_results", seconds * 1000, "ms",
+                                      False))
+                seconds = best_time(lambda: db_manager.get_environments(limit=50), repeats)
+                metrics.append(metric(f"database/get_environments_page/{result_count}_results", seconds * 1000,
+                                      "ms", False))
+        finally:
+            db_manager.close()
+    return metrics
+
+
+def benchmark(quick=False, seed=0) -> list:
+    if quick:
+        return run(environment_count=200, result_counts=(1_000, 10_000), repeats=5, seed=seed)
+    return run(seed=seed)
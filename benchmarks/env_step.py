@@ -0,0 +1,42 @@
+"""
+Steps/sec of Environment.step and Environment.step_index across board sizes.
+"""
+import time
+
+import numpy as np
+
+from benchmarks.common import make_environment, metric
+
+BOARD_SIZES = ((10, 10), (100, 100), (1000, 1000))
+QUICK_BOARD_SIZES = ((10, 10), (100, 100))
+
+
+def _steps_per_sec(env, step, actions):
+    env.reset()
+    started = time.perf_counter()
+    for action in actions:
+        if step(action)[2]:
+            env.reset()
+    return len(actions) / (time.perf_counter() - started)
+
+
+def run(board_sizes=BOARD_SIZES, steps=200_000, seed=0) -> list:
+    metrics = []
+    rng = np.random.default_rng(seed)
+    for board_size in board_sizes:
+        env = make_environment(board_size, seed=seed)
+        action_indices = rng.integers(0, len(env.action_space), steps).tolist()
+        actions = [env.action_space[index] for index in action_indices]
+        env.reset()
+        env.step_index(0)  # Compile the transition table outside the timed loop
+        label = f"{board_size[0]}x{board_size[1]}"
+        metrics.append(metric(f"env_step/step/{label}", _steps_per_sec(env, env.step, actions), "steps/sec"))
+        metrics.append(metric(f"env_step/step_index/{label}", _steps_per_sec(env, env.step_index, action_indices),
+                              "steps/sec"))
+    return metrics
+
+
+def benchmark(quick=False, seed=0) -> list:
+    if quick:
+        return run(QUICK_BOARD_SIZES, steps=50_000, seed=seed)
+    return run(seed=seed)
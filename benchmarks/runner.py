@@ -0,0 +1,135 @@
+"""
+Runs the benchmark suites, writes the results as JSON and compares them against a stored baseline and the
+absolute budgets some metrics carry.
+
+Run with: python -m benchmarks [--suite env_step training ...] [--quick] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--threshold 0.1] [--save-baseline]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+import numpy as np
+
+from benchmarks import database, env_step, startup, train_backends, training
+
+# Suites by name, each a module with benchmark(quick, seed) returning a list of metric dicts
+SUITES = {
+    'env_step': env_step,
+    'training': training,
+    'train_backends': train_backends,
+    'database': database,
+    'startup': startup,
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def machine_info() -> dict:
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def run_suites(names, quick=False, seed=0) -> dict:
+    metrics = []
+    for name in names:
+        print(f"Running {name}...")
+        metrics.extend(SUITES[name].benchmark(quick=quick, seed=seed))
+    return {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "quick": quick,
+        "seed": seed,
+        "metrics": metrics,
+    }
+
+
+def compare(report, baseline, threshold) -> list:
+    """
+    Match the metrics of report against baseline by name. Returns one dict per metric present in both, with
+    the relative change in the metric's better direction and whether it got worse by more than threshold.
+    """
+    baseline_values = {entry["name"]: entry["value"] for entry in baseline["metrics"]}
+    comparisons = []
+    for entry in report["metrics"]:
+        previous = baseline_values.get(entry["name"])
+        if not previous:
+            continue
+        change = (entry["value"] - previous) / previous
+        if not entry["higher_is_better"]:
+            change = -change
+        comparisons.append({
+            "name": entry["name"],
+            "baseline": previous,
+            "value": entry["value"],
+            "unit": entry["unit"],
+            "change": change,
+            "regressed": change < -threshold,
+        })
+    return comparisons
+
+
+def over_budget(report) -> list:
+    """
+    Metrics of report that are on the wrong side of their budget, whatever the baseline says.
+    """
+    return [entry for entry in report["metrics"] if "budget" in entry and
+            (entry["value"] < entry["budget"] if entry["higher_is_better"] else entry["value"] > entry["budget"])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark environment stepping, training, the database and start-up.")
+    parser.add_argument("--suite", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="smaller boards and fewer repetitions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default: 0.10)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run_suites(args.suite, quick=args.quick, seed=args.seed)
+    for entry in report["metrics"]:
+        print(f"{entry['name']:<60} {entry['value']:>16,.3f} {entry['unit']}")
+    exceeded = over_budget(report)
+    for entry in exceeded:
+        print(f"{entry['name']:<60} OVER BUDGET of {entry['budget']:,} {entry['unit']}")
+    status = 1 if exceeded else 0
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return status
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return status
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get("quick") != report["quick"]:
+        print("Warning: the baseline was recorded with a different --quick setting.")
+    comparisons = compare(report, baseline, args.threshold)
+    regressions = [comparison for comparison in comparisons if comparison["regressed"]]
+    for comparison in comparisons:
+        flag = "REGRESSION" if comparison["regressed"] else ""
+        print(f"{comparison['name']:<60} {comparison['change']:>+8.1%} {flag}")
+    print(f"{len(regressions)} of {len(comparisons)} metrics regressed by more than {args.threshold:.0%}.")
+    return 1 if regressions else status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Start-up cost of the command line tool, each run in a fresh interpreter: the -X importtime cost of importing main,
+the wall time until the login menu has been shown, and how many heavy modules the menu pulls in.
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import metric
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The login menu has to be on screen within this many milliseconds
+BUDGET_MS = 100
+# Modules that only the features behind the menu need; each costs tens of milliseconds to import
+HEAVY_MODULES = ('numpy', 'bcrypt', 'colorama', 'environment.agent', 'interface.console_interface')
+
+_IMPORT_TIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)")
+
+
+def _run_python(args, directory, stdin=b""):
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, *args], cwd=directory, input=stdin, capture_output=True,
+                          env=environment, check=True)
+
+
+def import_profile(directory):
+    """
+    Cumulative microseconds -X importtime reports for importing main, and the names of every module it loaded.
+    """
+    stderr = _run_python(["-X", "importtime", "-c", "import main"], directory).stderr.decode()
+    cumulative = {name: int(microseconds) for microseconds, name in _IMPORT_TIME.findall(stderr)}
+    return cumulative["main"], set(cumulative)
+
+
+def menu_seconds(directory):
+    """
+    Wall time of starting main.py, showing the login menu and choosing Exit, interpreter start-up included.
+    """
+    started = time.perf_counter()
+    _run_python([os.path.join(ROOT, "main.py")], directory, stdin=b"3\n")
+    return time.perf_counter() - started
+
+
+def run(repeats=10) -> list:
+    # Runs in a scratch directory, main.py creates its database in the working directory
+    with tempfile.TemporaryDirectory() as directory:
+        menu_seconds(directory)  # Creates the database, so the measured runs only open it
+        import_microseconds = min(import_profile(directory)[0] for _ in range(repeats))
+        modules = import_profile(directory)[1]
+        seconds = min(menu_seconds(directory) for _ in range(repeats))
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+    return [
+        metric("startup/import_main", import_microseconds / 1000, "ms", False, budget=BUDGET_MS),
+        metric("startup/login_menu", seconds * 1000, "ms", False, budget=BUDGET_MS),
+        metric("startup/heavy_modules", len(heavy), "modules", False, budget=0),
+    ]
+
+
+def benchmark(quick=False, seed=0) -> list:
+    # Nothing random to seed; seed is accepted like every other suite
+    return run(repeats=3 if quick else 10)
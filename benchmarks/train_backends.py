@@ -0,0 +1,88 @@
+"""
+Compare steps/sec of the reference and fast training backends on one board.
+
+The fast backend targets TARGET_SPEEDUP times the steps/sec of the reference, and main() reports per agent
+whether a run met it; the ratio depends on the machine and the board, so no agent is promised to. SARSA falls
+short at about 5-7x on the default board: its reference loop makes no NumPy reduction when it explores, so it
+is already several times faster per step than the Q-learning one, and its pure-Python kernel has no per-step
+work left to cut. Reaching the target for SARSA would take a compiled kernel.
+
+Run with: python -m benchmarks.train_backends [--board 10 10] [--episodes 2000] [--seed 0] [--repeats 3]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import make_environment, metric
+from environment.agent import QLearningAgent, SarsaAgent
+
+TARGET_SPEEDUP = 10
+
+
+def run(board_size=(10, 10), episodes=2000, seed=0, repeats=3):
+    """
+    Train both agents with both backends and return one result dict per (agent, backend) pair, timed as the
+    fastest of repeats runs.
+    """
+    env = make_environment(board_size, seed=seed)
+    state_space_size = board_size[0] * board_size[1]
+    results = []
+    for agent_class in (QLearningAgent, SarsaAgent):
+        q_tables = {}
+        for backend in ("reference", "fast"):
+            elapsed = float("inf")
+            for _ in range(repeats):
+                agent = agent_class(state_space_size, len(env.action_space))
+                started = time.perf_counter()
+                agent.train(env, total_episodes=episodes, seed=seed, backend=backend)
+                elapsed = min(elapsed, time.perf_counter() - started)
+            q_tables[backend] = agent.q_table
+            results.append({
+                "agent": agent_class.__name__,
+                "backend": backend,
+                "steps": agent.steps_trained,
+                "seconds": elapsed,
+                "steps_per_sec": agent.steps_trained / elapsed,
+            })
+        if not np.array_equal(q_tables["reference"], q_tables["fast"]):
+            raise AssertionError(f"{agent_class.__name__}: fast backend Q-table differs from the reference.")
+    return results
+
+
+def speedups(results) -> dict:
+    """
+    Steps/sec of the fast backend over the reference, per agent.
+    """
+    rates = {(result["agent"], result["backend"]): result["steps_per_sec"] for result in results}
+    return {agent: rates[agent, "fast"] / rates[agent, "reference"] for agent, backend in rates if backend == "fast"}
+
+
+def benchmark(quick=False, seed=0) -> list:
+    results = run(episodes=500 if quick else 2000, seed=seed, repeats=1 if quick else 3)
+    metrics = [metric(f"train_backends/{result['agent']}/{result['backend']}", result["steps_per_sec"], "steps/sec")
+               for result in results]
+    metrics.extend(metric(f"train_backends/{agent}/speedup", speedup, "x")
+                   for agent, speedup in speedups(results).items())
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--board", type=int, nargs=2, default=(10, 10))
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(tuple(args.board), args.episodes, args.seed, args.repeats)
+    for result in results:
+        print(f"{result['agent']:<15} {result['backend']:<10} {result['steps']:>10} steps "
+              f"{result['steps_per_sec']:>14,.0f} steps/sec")
+    for agent, speedup in speedups(results).items():
+        status = "met" if speedup >= TARGET_SPEEDUP else "not met"
+        print(f"{agent}: fast backend is {speedup:.1f}x the reference (target {TARGET_SPEEDUP}x: {status})")
+
+
+if __name__ == "__main__":
+    main()
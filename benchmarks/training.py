@@ -0,0 +1,50 @@
+"""
+Episodes/sec and time-to-convergence of the Q-learning and SARSA agents.
+
+An agent counts as converged once its greedy policy walks the shortest path to the goal. The episode budget
+doubles until that happens, and the wall time of the first converged run is reported.
+"""
+import time
+
+from benchmarks.common import make_environment, metric
+from environment.agent import QLearningAgent, SarsaAgent
+
+AGENT_CLASSES = (QLearningAgent, SarsaAgent)
+BOARD_SIZES = ((5, 5), (10, 10))
+
+
+def _train(agent_class, env, episodes, seed, backend):
+    agent = agent_class(env.board_size[0] * env.board_size[1], len(env.action_space))
+    started = time.perf_counter()
+    agent.train(env, total_episodes=episodes, seed=seed, backend=backend)
+    return agent, time.perf_counter() - started
+
+
+def run(board_sizes=BOARD_SIZES, episodes=2000, max_episodes=1 << 15, seed=0, backend="reference") -> list:
+    metrics = []
+    for board_size in board_sizes:
+        env = make_environment(board_size, seed=seed)
+        optimal_steps = env.shortest_path_length()
+        label = f"{board_size[0]}x{board_size[1]}"
+        for agent_class in AGENT_CLASSES:
+            name = f"training/{agent_class.__name__}/{label}"
+            _, elapsed = _train(agent_class, env, episodes, seed, backend)
+            metrics.append(metric(f"{name}/episodes_per_sec", episodes / elapsed, "episodes/sec"))
+
+            budget = 64
+            while budget <= max_episodes:
+                agent, elapsed = _train(agent_class, env, budget, seed, backend)
+                if env.evaluate(agent)["min_steps"] == optimal_steps:
+                    metrics.append(metric(f"{name}/convergence_episodes", budget, "episodes", False))
+                    metrics.append(metric(f"{name}/convergence_seconds", elapsed, "s", False))
+                    break
+                budget *= 2
+            else:
+                print(f"{name}: no optimal policy within {max_episodes} episodes")
+    return metrics
+
+
+def benchmark(quick=False, seed=0) -> list:
+    if quick:
+        return run(((5, 5),), episodes=500, max_episodes=1 << 12, seed=seed)
+    return run(seed=seed)
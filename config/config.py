@@ -9,6 +9,10 @@ DEFAULT_CONFIG = {
         'step': 0
     },
     'action_space': ['up', 'down', 'left', 'right'],
-    'max_steps': 1000
+    'max_steps': 1000,
+    'policy_cache_bytes': 256 * 1024 * 1024,  # Memory budget of the in-process Q-table cache
+    'job_workers': 2,  # Training jobs the web interface runs in parallel
+    'job_queue_limit': 32,  # Queued plus running jobs before POST /jobs answers 429
+    'max_bulk_board_side': 500  # Largest rows or cols a POST /environment/bulk size may have
 }
 
@@ -0,0 +1,69 @@
+import sqlite3
+import threading
+
+# Applied to every new connection. WAL lets readers run alongside the single writer, and synchronous=NORMAL
+# only fsyncs at checkpoints instead of on every commit.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -16000;",  # 16 MB page cache per connection
+)
+
+
+class ConnectionPool:
+    """
+    Hands each thread its own SQLite connection and keeps released connections for reuse by other threads.
+    """
+
+    def __init__(self, db_name, timeout=120):
+        self.db_name = db_name
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._connections = []
+        # Every connection to ":memory:" opens a separate database, so all threads must share one
+        self._shared = db_name == ":memory:"
+
+    def _open(self):
+        connection = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        self._connections.append(connection)
+        return connection
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Return the calling thread's connection, taking an idle one or opening a new one on first use.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            with self._lock:
+                if self._idle:
+                    connection = self._idle.pop()
+                elif self._shared and self._connections:
+                    connection = self._connections[0]
+                else:
+                    connection = self._open()
+            self._local.connection = connection
+        return connection
+
+    def release(self):
+        """
+        Give the calling thread's connection back to the pool, e.g. at the end of a web request.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._shared:
+            return
+        self._local.connection = None
+        with self._lock:
+            self._idle.append(connection)
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            self._idle.clear()
+        self._local = threading.local()
@@ -1,11 +1,48 @@
+import ast
 import sqlite3
-import bcrypt
+
+from database.connection_pool import ConnectionPool
+from database.result_writer import ResultWriter
+
+# bcrypt and database.layout, which loads NumPy, are imported by the methods that need them, so opening the
+# database for the login menu stays fast
+
+# Bumped whenever _migrate learns a new step; stored in the database as PRAGMA user_version
+SCHEMA_VERSION = 4
+
+ENVIRONMENTS_TABLE = """CREATE TABLE IF NOT EXISTS {name} (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT,
+                        rows INTEGER,
+                        cols INTEGER,
+                        obstacle_count INTEGER,
+                        obstacles BLOB,  -- Row-major obstacle bitmap, see database/layout.py
+                        start_row INTEGER,
+                        start_col INTEGER,
+                        end_row INTEGER,
+                        end_col INTEGER,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        play_count INTEGER DEFAULT 0,  -- Kept up to date by triggers on results
+                        moves BLOB  -- Action space as move vectors, NULL for up/down/left/right
+                    );"""
 
 
 class DatabaseManager:
-    def __init__(self, db_name):
-        self.connection = sqlite3.connect(db_name, timeout=120)
+    def __init__(self, db_name, result_batch_size=500, result_flush_interval=1.0):
+        self.db_name = db_name
+        self._pool = ConnectionPool(db_name, timeout=120)
         self._create_tables()
+        self._migrate()
+        self.result_writer = ResultWriter(self.store_results, result_batch_size, result_flush_interval)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's connection; each thread gets its own from the pool."""
+        return self._pool.connection()
+
+    def release_connection(self):
+        """Return the calling thread's connection to the pool for reuse by other threads."""
+        self._pool.release()
 
     def _create_tables(self):
         with self.connection:
@@ -15,16 +52,7 @@ class DatabaseManager:
                 password BLOB,  -- Change password type to BLOB for binary data
                 env_num INTEGER DEFAULT 0
             );""")
-            self.connection.execute("""CREATE TABLE IF NOT EXISTS environments (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username TEXT,
-                        board_size TEXT,
-                        obstacle_count INTEGER,
-                        obstacle_position TEXT,
-                        start TEXT,
-                        end TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );""")
+            self.connection.execute(ENVIRONMENTS_TABLE.format(name="environments"))
             self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
                                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                                     board_id INTEGER,
@@ -32,8 +60,103 @@ class DatabaseManager:
                                     reward INTEGER DEFAULT 0,
                                     player_username TEXT,                                    
                                     played_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                    algorithm TEXT,
+                                    params TEXT,
+                                    wall_time REAL,
                                     FOREIGN KEY (board_id) REFERENCES environments (id) ON DELETE CASCADE
                                 );""")
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS q_tables (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    environment_id INTEGER,
+                                    algorithm TEXT,
+                                    params TEXT,
+                                    fingerprint TEXT,
+                                    path TEXT,
+                                    nbytes INTEGER,
+                                    trained_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                    UNIQUE (environment_id, algorithm, params),
+                                    FOREIGN KEY (environment_id) REFERENCES environments (id) ON DELETE CASCADE
+                                );""")
+
+    def _migrate(self):
+        """
+        Bring databases created by older versions up to SCHEMA_VERSION in place.
+        """
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.connection:
+            # DDL does not open a transaction implicitly; make the whole upgrade atomic
+            self.connection.execute("BEGIN")
+            if version < 1:
+                # Results written by the sweep runner record their configuration and timing
+                columns = {row[1] for row in self.connection.execute("PRAGMA table_info(results)")}
+                for column, column_type in (("algorithm", "TEXT"), ("params", "TEXT"), ("wall_time", "REAL")):
+                    if column not in columns:
+                        self.connection.execute(f"ALTER TABLE results ADD COLUMN {column} {column_type};")
+            if version < 2:
+                self._migrate_layout_encoding()
+            if version < 3:
+                self._migrate_play_counts()
+            if version < 4:
+                # Environments stored before action spaces were configurable keep the default four moves
+                columns = {row[1] for row in self.connection.execute("PRAGMA table_info(environments)")}
+                if "moves" not in columns:
+                    self.connection.execute("ALTER TABLE environments ADD COLUMN moves BLOB;")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+
+    def _migrate_layout_encoding(self):
+        """
+        Convert environments stored as stringified tuples and sets into integer columns and an obstacle bitmap.
+        """
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(environments)")}
+        if "board_size" not in columns:
+            return
+        from database.layout import encode_obstacles
+        self.connection.execute(ENVIRONMENTS_TABLE.format(name="environments_encoded"))
+        cursor = self.connection.execute("SELECT id, username, board_size, obstacle_count, obstacle_position, "
+                                         "start, end, created_at FROM environments")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            converted = []
+            for environment_id, username, board_size, obstacle_count, obstacles, start, end, created_at in rows:
+                board_size, start, end = (tuple(ast.literal_eval(value)) for value in (board_size, start, end))
+                converted.append((environment_id, username, board_size[0], board_size[1], obstacle_count,
+                                  encode_obstacles(ast.literal_eval(obstacles), board_size),
+                                  start[0], start[1], end[0], end[1], created_at))
+            self.connection.executemany(
+                "INSERT INTO environments_encoded (id, username, rows, cols, obstacle_count, obstacles, "
+                "start_row, start_col, end_row, end_col, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                converted
+            )
+        self.connection.execute("DROP TABLE environments;")
+        self.connection.execute("ALTER TABLE environments_encoded RENAME TO environments;")
+
+    def _migrate_play_counts(self):
+        """
+        Index the listing and history lookups and maintain environments.play_count with triggers,
+        so listings no longer count results per row.
+        """
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(environments)")}
+        if "play_count" not in columns:
+            self.connection.execute("ALTER TABLE environments ADD COLUMN play_count INTEGER DEFAULT 0;")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_environments_username "
+                                "ON environments (username, id);")
+        # Covers both the per-board count and SUM(reward) of get_results_for_user
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_results_board_id ON results (board_id, reward);")
+        self.connection.execute("""CREATE TRIGGER IF NOT EXISTS results_play_count_insert AFTER INSERT ON results
+                                   BEGIN
+                                       UPDATE environments SET play_count = play_count + 1 WHERE id = NEW.board_id;
+                                   END;""")
+        self.connection.execute("""CREATE TRIGGER IF NOT EXISTS results_play_count_delete AFTER DELETE ON results
+                                   BEGIN
+                                       UPDATE environments SET play_count = play_count - 1 WHERE id = OLD.board_id;
+                                   END;""")
+        self.connection.execute("""UPDATE environments SET play_count = (
+                                       SELECT COUNT(*) FROM results r WHERE r.board_id = environments.id
+                                   );""")
 
     def username_exists(self, username):
         cursor = self.connection.cursor()
@@ -41,12 +164,14 @@ class DatabaseManager:
         return cursor.fetchone() is not None
 
     def add_user(self, username, password):
+        import bcrypt
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
         with self.connection:
             self.connection.execute("INSERT INTO users (username, password) VALUES (?, ?)",
                                     (username, hashed_password))
 
     def verify_password(self, username, password):
+        import bcrypt
         cursor = self.connection.cursor()
         cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
         row = cursor.fetchone()
@@ -58,74 +183,80 @@ class DatabaseManager:
         return False
 
     def store_environment(self, env, username):
-        # Use the username to create a unique table for the user's environments
+        from database.layout import encode_layout
+        self.store_layouts([encode_layout(env)], username)
+
+    def store_layouts(self, layouts, username):
+        """
+        Insert many encoded layouts (see database.layout.EncodedLayout) for one user in a single transaction.
+        """
+        layouts = list(layouts)
         with self.connection:
-            self.connection.execute(f"INSERT INTO environments (username, board_size, obstacle_count, obstacle_position, start, end) VALUES (?, ?, ?, ?, ?, ?)",
-                                    (username, str(env.board_size), env.obstacle_count, str(env.obstacles), str(env.start), str(env.end)))
-            self.connection.execute("UPDATE users SET env_num = env_num + 1 WHERE username = ?;", (username,))
+            self.connection.executemany(
+                "INSERT INTO environments (username, rows, cols, obstacle_count, obstacles, start_row, start_col, "
+                "end_row, end_col, moves) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((username, *layout) for layout in layouts)
+            )
+            self.connection.execute("UPDATE users SET env_num = env_num + ? WHERE username = ?;",
+                                    (len(layouts), username))
 
-    def get_user_environments(self, username) -> list[tuple]:
+    @staticmethod
+    def _environment_query(username, after_id, limit, offset):
+        # Keyset pagination (after_id) continues below the last id of the previous page without scanning it
+        conditions, parameters = [], []
+        if username is not None:
+            conditions.append("e.username = ?")
+            parameters.append(username)
+        if after_id is not None:
+            conditions.append("e.id < ?")
+            parameters.append(after_id)
+        query = f"""
+        SELECT 
+            e.id AS environment_id,
+            e.username AS creator,
+            e.rows,
+            e.cols,
+            e.obstacle_count,
+            e.obstacles,
+            e.start_row,
+            e.start_col,
+            e.end_row,
+            e.end_col,
+            e.created_at,
+            e.play_count,
+            e.moves
+        FROM environments e
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY e.id DESC
+        """
+        if limit is not None or offset:
+            query += "LIMIT ? OFFSET ?"
+            parameters.extend((limit if limit is not None else -1, offset))
+        return query, parameters
+
+    def get_environments(self, username=None, limit=None, offset=0, after_id=None) -> list:
         """
-        Retrieve environments with an option for all or only the user's environments.
+        List stored environments as EnvironmentRow, newest first, optionally only those created by username.
+        Page with limit/offset, or pass the last environment_id of a page as after_id to fetch the next one.
         """
-        cursor = self.connection.cursor()
+        self.flush_results()  # Count queued results too
+        cursor = self.connection.execute(*self._environment_query(username, after_id, limit, offset))
+        from database.layout import EnvironmentRow
+        return [EnvironmentRow.from_columns(*row) for row in cursor.fetchall()]
 
+    def iter_environments(self, username=None, batch_size=500, after_id=None):
+        """
+        Stream environments like get_environments, fetching batch_size rows at a time.
+        """
+        self.flush_results()
+        from database.layout import EnvironmentRow
+        cursor = self.connection.execute(*self._environment_query(username, after_id, None, 0))
         while True:
-            user_input = input("Do you want to retrieve all environments? (y/n): ").strip().lower()
-            if user_input in ['y', 'n', '']:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
                 break
-            print("Invalid input. Please enter 'y' for all environments or 'n' for only your environments.")
-
-        try:
-            if user_input == 'y' or user_input == '':
-                # Fetch all environments
-                query = """
-                SELECT 
-                    e.id AS environment_id,
-                    e.username AS creator,
-                    e.board_size,
-                    e.obstacle_count,
-                    e.obstacle_position,
-                    e.start,
-                    e.end,
-                    e.created_at,
-                    (SELECT COUNT(*) FROM results r WHERE r.board_id = e.id) AS play_count
-                FROM environments e
-                ORDER BY e.created_at DESC
-                """
-                cursor.execute(query)
-            else:
-                # Fetch only the user's environments
-                query = """
-                SELECT 
-                    e.id AS environment_id,
-                    e.username AS creator,
-                    e.board_size,
-                    e.obstacle_count,
-                    e.obstacle_position,
-                    e.start,
-                    e.end,
-                    e.created_at,
-                    (SELECT COUNT(*) FROM results r WHERE r.board_id = e.id) AS play_count
-                FROM environments e
-                WHERE e.username = ?
-                ORDER BY e.created_at DESC
-                """
-                cursor.execute(query, (username,))
-
-            environments = cursor.fetchall()
-
-            if not environments:
-                print("No environments found.")
-                return []
-
-            return environments
-        except sqlite3.OperationalError as e:
-            print(f"Database error occurred: {e}")
-            return []
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            return []
+            for row in rows:
+                yield EnvironmentRow.from_columns(*row)
 
     def get_user_history(self, username) -> list:
         """
@@ -138,18 +269,14 @@ class DatabaseManager:
             SELECT 
                 e.id AS environment_id, 
                 e.username AS creator, 
-                e.board_size, 
-                e.obstacle_position,
-                e.start, 
-                e.end
+                e.rows,
+                e.cols,
+                e.obstacle_count,
+                e.start_row,
+                e.start_col,
+                e.end_row,
+                e.end_col
             FROM environments e
-            LEFT JOIN (
-                SELECT 
-                    r.board_id, 
-                    COUNT(*) AS play_count  -- Count total plays per board_id
-                FROM results r
-                GROUP BY r.board_id
-            ) play_data ON e.id = play_data.board_id
             WHERE e.username = ?
             ORDER BY e.id ASC
             """
@@ -160,27 +287,78 @@ class DatabaseManager:
             print(f"Error retrieving play history: {e}")
             return []
 
-    def store_result(self, board_id, actions_taken, reward, player_username):
+    def store_result(self, board_id, actions_taken, reward, player_username, algorithm=None, params=None,
+                     wall_time=None):
+        """
+        Queue a result for the buffered writer; it reaches the table with the next batch.
+        """
+        self.result_writer.add((board_id, actions_taken, reward, player_username, algorithm, params, wall_time))
+
+    def flush_results(self):
+        """Write all queued results now."""
+        self.result_writer.flush()
+
+    def store_results(self, results):
+        """
+        Insert many results in one transaction. Each item is a tuple of
+        (board_id, actions_taken, reward, player_username, algorithm, params, wall_time).
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO results (board_id, actions_taken, reward, player_username, algorithm, params, wall_time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                results
+            )
+
+    def load_environment(self, environment_id):
+        """
+        Build the stored environment with the given id, or return None if the id is unknown.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT rows, cols, obstacles, start_row, start_col, end_row, end_col, moves "
+                       "FROM environments WHERE id = ?", (environment_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        from database.layout import build_environment
+        return build_environment(*row)
+
+    def store_q_table_record(self, environment_id, algorithm, params, fingerprint, path, nbytes):
+        """
+        Record where the trained Q-table for (environment_id, algorithm, params) lives, replacing older entries.
+        """
         with self.connection:
             self.connection.execute(
-                "INSERT INTO results (board_id, actions_taken, reward, player_username) VALUES (?, ?, ?, ?)",
-                (board_id, actions_taken, reward, player_username)
+                "INSERT OR REPLACE INTO q_tables (environment_id, algorithm, params, fingerprint, path, nbytes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (environment_id, algorithm, params, fingerprint, path, nbytes)
             )
 
+    def get_q_table_record(self, environment_id, algorithm, params):
+        """
+        Return (fingerprint, path, nbytes) of a stored Q-table, or None.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT fingerprint, path, nbytes FROM q_tables "
+                       "WHERE environment_id = ? AND algorithm = ? AND params = ?",
+                       (environment_id, algorithm, params))
+        return cursor.fetchone()
+
     def get_results_for_user(self, username):
         """
         Retrieve all results for the user's environments, grouped by environment.
         """
+        self.flush_results()  # Count queued results too
         cursor = self.connection.cursor()
         query = """
         SELECT 
-            r.board_id, e.board_size, e.start, e.end,
+            r.board_id, e.rows, e.cols, e.start_row, e.start_col, e.end_row, e.end_col,
             COUNT(r.id) AS play_count, SUM(r.reward) AS total_reward
         FROM results r
         JOIN environments e ON r.board_id = e.id
         WHERE e.username = ?
         GROUP BY r.board_id
-        ORDER BY e.created_at
+        ORDER BY e.id
         """
         cursor.execute(query, (username,))
         return cursor.fetchall()
@@ -197,6 +375,7 @@ class DatabaseManager:
                 self.connection.execute(f"DROP TABLE IF EXISTS {table};")
 
     def close(self):
-        """Close the database connection."""
-        self.connection.close()
+        """Write queued results and close every pooled connection."""
+        self.result_writer.close()
+        self._pool.close()
 
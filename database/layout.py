@@ -0,0 +1,113 @@
+"""
+Compact storage format for environment layouts.
+
+Dimensions, start and end live in integer columns; obstacles are a row-major bitmap of the board packed eight
+cells per byte with np.packbits. The action space is stored as its (drow, dcol) move vectors, int16 pairs, and
+left NULL for the default four moves.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from environment.rl_environment import ACTION_SETS, Environment, compile_action_space
+
+_DEFAULT_MOVES = compile_action_space(ACTION_SETS['basic'])[1]
+
+
+def encode_obstacles(obstacles, board_size) -> bytes:
+    """
+    Pack a collection of (row, col) obstacles into a bitmap BLOB.
+    """
+    rows, cols = board_size
+    grid = np.zeros(rows * cols, dtype=bool)
+    if obstacles:
+        cells = np.array(list(obstacles), dtype=np.int64).reshape(-1, 2)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < rows) & (cells[:, 1] >= 0) & (cells[:, 1] < cols)
+        grid[cells[inside, 0] * cols + cells[inside, 1]] = True
+    return np.packbits(grid).tobytes()
+
+
+def decode_obstacles(blob, board_size) -> set:
+    """
+    Unpack a bitmap BLOB back into a set of (row, col) tuples.
+    """
+    rows, cols = board_size
+    bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), count=rows * cols)
+    cells = np.flatnonzero(bits)
+    return set(zip((cells // cols).tolist(), (cells % cols).tolist()))
+
+
+def encode_moves(moves) -> bytes:
+    """
+    Pack an (action_count, 2) array of move vectors into a BLOB, or None for the default action space.
+    """
+    moves = np.asarray(moves, dtype=np.int64).reshape(-1, 2)
+    if np.array_equal(moves, _DEFAULT_MOVES):
+        return None
+    return moves.astype('<i2').tobytes()
+
+
+def decode_moves(blob) -> list:
+    """
+    Unpack a moves BLOB into a list of (drow, dcol) pairs, or None when the column is NULL.
+    """
+    if blob is None:
+        return None
+    return [tuple(move) for move in np.frombuffer(blob, dtype='<i2').reshape(-1, 2).tolist()]
+
+
+class EncodedLayout(NamedTuple):
+    """
+    An environment in the column order of the environments table.
+    """
+    rows: int
+    cols: int
+    obstacle_count: int
+    obstacles: bytes
+    start_row: int
+    start_col: int
+    end_row: int
+    end_col: int
+    moves: bytes = None
+
+
+def encode_layout(env) -> EncodedLayout:
+    return EncodedLayout(env.board_size[0], env.board_size[1], len(env.obstacles),
+                         encode_obstacles(env.obstacles, env.board_size), env.start[0], env.start[1], env.end[0],
+                         env.end[1], encode_moves(env.moves))
+
+
+def build_environment(rows, cols, obstacles, start_row, start_col, end_row, end_col, moves=None) -> Environment:
+    """
+    Build an Environment straight from the stored columns.
+    """
+    board_size = (rows, cols)
+    obstacle_cells = decode_obstacles(obstacles, board_size)
+    return Environment(board_size=board_size, obstacle_count=len(obstacle_cells), start=(start_row, start_col),
+                       end=(end_row, end_col), obstacles=obstacle_cells, action_space=decode_moves(moves))
+
+
+class EnvironmentRow(NamedTuple):
+    """
+    One stored environment as returned by DatabaseManager.get_environments, with positions already parsed.
+    The obstacle bitmap stays packed until to_environment() is called.
+    """
+    environment_id: int
+    creator: str
+    board_size: tuple
+    obstacle_count: int
+    start: tuple
+    end: tuple
+    created_at: str
+    play_count: int
+    obstacles: bytes
+    moves: bytes
+
+    @classmethod
+    def from_columns(cls, environment_id, creator, rows, cols, obstacle_count, obstacles, start_row, start_col,
+                     end_row, end_col, created_at, play_count, moves):
+        return cls(environment_id, creator, (rows, cols), obstacle_count, (start_row, start_col),
+                   (end_row, end_col), created_at, play_count, obstacles, moves)
+
+    def to_environment(self) -> Environment:
+        return build_environment(*self.board_size, self.obstacles, *self.start, *self.end, self.moves)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Agent attributes that change what training converges to; whichever an agent has set become part of its key
+HYPERPARAMETERS = ('learning_rate', 'gamma', 'decay_rate', 'min_epsilon', 'max_epsilon', 'method',
+                   'epsilon_schedule', 'trace_decay', 'trace_type', 'trace_cutoff', 'planning_steps', 'prioritized',
+                   'priority_threshold', 'queue_size', 'tolerance', 'max_iterations')
+
+
+def _json_value(value):
+    # NumPy scalars are stored as floats, other objects such as epsilon schedules by their repr
+    try:
+        return float(value)
+    except TypeError:
+        return repr(value)
+
+
+def policy_key(environment_id, agent):
+    """
+    Build the (environment_id, algorithm, params) key a trained agent is stored under.
+    """
+    params = {name: getattr(agent, name) for name in HYPERPARAMETERS if getattr(agent, name, None) is not None}
+    return environment_id, type(agent).__name__, json.dumps(params, sort_keys=True, default=_json_value)
+
+
+class PolicyStore:
+    """
+    Trained Q-tables saved as .npy files in a directory next to the SQLite database,
+    indexed by the q_tables table.
+    """
+
+    def __init__(self, db_manager, directory=None):
+        self.db_manager = db_manager
+        if directory is None:
+            directory = os.path.splitext(os.path.abspath(db_manager.db_name))[0] + "_q_tables"
+        self.directory = directory
+
+    def save(self, key, fingerprint, q_table):
+        environment_id, algorithm, params = key
+        os.makedirs(self.directory, exist_ok=True)
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + ".npy"
+        path = os.path.join(self.directory, name)
+        # Write aside and rename so a reader never maps a half-written file
+        temporary_path = path + ".tmp"
+        with open(temporary_path, 'wb') as file:
+            np.save(file, np.ascontiguousarray(q_table))
+        os.replace(temporary_path, path)
+        self.db_manager.store_q_table_record(environment_id, algorithm, params, fingerprint, name, q_table.nbytes)
+
+    def load(self, key, fingerprint):
+        """
+        Memory-map the stored Q-table for key, or return None if it is missing or was trained on another layout.
+        """
+        record = self.db_manager.get_q_table_record(*key)
+        if record is None or record[0] != fingerprint:
+            return None
+        path = os.path.join(self.directory, record[1])
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
+
+
+class PolicyCache:
+    """
+    In-process LRU of Q-tables in front of a PolicyStore, bounded by the total size of the tables it holds.
+    """
+
+    def __init__(self, store, max_bytes):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._tables = OrderedDict()
+
+    def get(self, key, fingerprint):
+        entry = self._tables.get(key)
+        if entry is not None:
+            if entry[0] == fingerprint:
+                self._tables.move_to_end(key)
+                return entry[1]
+            # Trained on a layout the environment no longer has
+            del self._tables[key]
+            self.current_bytes -= entry[1].nbytes
+        q_table = self.store.load(key, fingerprint)
+        if q_table is not None:
+            self._remember(key, fingerprint, q_table)
+        return q_table
+
+    def put(self, key, fingerprint, q_table):
+        self.store.save(key, fingerprint, q_table)
+        self._remember(key, fingerprint, q_table)
+
+    def _remember(self, key, fingerprint, q_table):
+        if key in self._tables:
+            self.current_bytes -= self._tables.pop(key)[1].nbytes
+        self._tables[key] = (fingerprint, q_table)
+        self.current_bytes += q_table.nbytes
+        # Evicted tables stay on disk and are mapped again on the next get
+        while self.current_bytes > self.max_bytes and self._tables:
+            _, (_, evicted) = self._tables.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
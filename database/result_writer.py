@@ -0,0 +1,58 @@
+import threading
+
+
+class ResultWriter:
+    """
+    Buffers result rows and writes them with one executemany per batch.
+
+    A batch is written as soon as batch_size rows are pending, by a background thread every flush_interval
+    seconds, and on flush() or close().
+    """
+
+    def __init__(self, write, batch_size=500, flush_interval=1.0):
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def add(self, row):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ResultWriter is closed.")
+            self._pending.append(row)
+            if self._thread is None:
+                # Started on first use so managers that never store results stay single-threaded
+                self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+                self._thread.start()
+            batch = self._take() if len(self._pending) >= self.batch_size else None
+        if batch:
+            self._write(batch)
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        return batch
+
+    def flush(self):
+        with self._condition:
+            batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
@@ -1,127 +1,691 @@
+import heapq
+import time
+from collections import defaultdict
+
 import numpy as np
-import random
 
 from config.config import DEFAULT_CONFIG
+from environment import fast_train
+from environment.exploration import ExplorationSampler, ExponentialSchedule
+from environment.instrumentation import TrainingMonitor
+from environment.q_table import ChunkedQTable, make_q_table
 
+TRAINING_BACKENDS = ("reference", "fast")
 
-class QLearningAgent:
-    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.2, gamma=0.9, epsilon=1, decay_rate=0.001):
-        self.q_table = np.zeros((state_space_size, action_space_size))
+
+def _check_training_options(backend, profiler):
+    if backend not in TRAINING_BACKENDS:
+        raise ValueError(f"Unknown training backend '{backend}', use one of {TRAINING_BACKENDS}.")
+    if profiler is not None and backend != "reference":
+        raise ValueError("The sampling profiler only supports the reference backend.")
+
+
+def _table_shape(env):
+    # Q-tables follow the environment being trained on, whatever action count the agent was constructed with
+    return env.board_size[0] * env.board_size[1], len(env.action_space)
+
+
+def _step_limit(env, max_steps_per_episode):
+    # The environment ends every episode after env.max_steps steps; the fast kernels, which do not step it, must too
+    return env.max_steps if max_steps_per_episode is None else min(max_steps_per_episode, env.max_steps)
+
+
+def _episode_hook(env, monitor, early_stopping, greedy_policy):
+    """
+    Combine the monitor and the early stopping test into the per-episode callable of the training loops,
+    which returns True when training should stop. None when neither is in use.
+    """
+    if monitor is None and early_stopping is None:
+        return None
+
+    def on_episode(steps, episode_return, q_delta, epsilon):
+        if monitor is not None:
+            monitor.episode(steps, episode_return, q_delta, epsilon)
+        return early_stopping is not None and early_stopping.update(env, q_delta, greedy_policy)
+    return on_episode
+
+
+class _LearningAgent:
+    """
+    Training bookkeeping shared by the learning agents: the epsilon schedule, setting up and finishing a
+    training run with its sampler, monitor and early stopping, and the per-state lists of the fast kernels.
+    Subclasses create q_table and implement train().
+    """
+
+    # Q-table element type and layout; QLearningAgent and SarsaAgent take both as arguments
+    dtype = np.float64
+    sparse = False
+
+    def __init__(self, learning_rate, gamma, epsilon, decay_rate, epsilon_schedule):
         self.learning_rate = learning_rate
         self.gamma = gamma
         self.epsilon = epsilon
         self.decay_rate = decay_rate
         self.max_epsilon = 1
         self.min_epsilon = 0.01
+        # An EpsilonSchedule from environment.exploration; None decays exponentially with the values above
+        self.epsilon_schedule = epsilon_schedule
+        self.steps_trained = 0
+        self.episodes_trained = 0
+
+    def _epsilon_schedule(self):
+        if self.epsilon_schedule is not None:
+            return self.epsilon_schedule
+        return ExponentialSchedule(self.epsilon, self.max_epsilon, self.min_epsilon, self.decay_rate)
 
-    def train(self, env, total_episodes=None, max_steps_per_episode=None):
+    def _begin_training(self, env, total_episodes, seed, callbacks, early_stopping):
+        """
+        Start a training run; returns the epsilon of every episode plus the decayed value left after the last
+        one, the exploration sampler and the monitor (None without callbacks).
+        """
+        epsilons = self._epsilon_schedule().values(total_episodes + 1)
+        sampler = ExplorationSampler(len(env.action_space), seed=seed)
+        monitor = TrainingMonitor(callbacks) if callbacks else None
+        if monitor is not None:
+            monitor.begin(self, env, total_episodes)
+        if early_stopping is not None:
+            early_stopping.begin(env)
+        return epsilons, sampler, monitor
+
+    def _finish_training(self, epsilons, total_episodes, monitor, early_stopping):
+        self.episodes_trained = early_stopping.episodes if early_stopping is not None else total_episodes
+        # Decay epsilon after the last episode
+        self.epsilon = epsilons[self.episodes_trained]
+        if monitor is not None:
+            monitor.end(self)
+
+    def _fast_rows(self):
+        """
+        Zeroed Q-values as the per-state lists the fast kernels update; sparse tables only create visited rows.
+        """
+        state_count, action_count = self.q_table.shape
+        if self.sparse:
+            return defaultdict(lambda: [0.0] * action_count)
+        return np.zeros((state_count, action_count)).tolist()
+
+    def _fast_policy(self, q_rows):
+        # Greedy action of every state from the fast kernels' rows; rows never created have all zeros
+        if isinstance(q_rows, dict):
+            policy = np.zeros(self.q_table.shape[0], dtype=np.int64)
+            states = list(q_rows)
+            if states:
+                policy[states] = np.argmax([q_rows[state] for state in states], axis=1)
+            return policy
+        return np.argmax(q_rows, axis=1)
+
+    def _from_fast_rows(self, q_rows):
+        if self.sparse:
+            return ChunkedQTable.from_rows(q_rows, *self.q_table.shape, dtype=self.dtype)
+        return np.array(q_rows, dtype=self.dtype).reshape(self.q_table.shape)
+
+    def _choose_action(self, state, sampler):
+        """
+        Choose an action using epsilon-greedy policy.
+        """
+        explore, random_action = sampler.next()
+        if explore > self.epsilon:
+            return int(np.argmax(self.q_table[state, :]))
+        return random_action
+
+    def select_action(self, state):
+        """
+        Select the best action for a given state based on the Q-table.
+        """
+        return np.argmax(self.q_table[state, :])
+
+
+class QLearningAgent(_LearningAgent):
+    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.2, gamma=0.9, epsilon=1, decay_rate=0.001,
+                 dtype=np.float64, sparse=False, epsilon_schedule=None):
+        super().__init__(learning_rate, gamma, epsilon, decay_rate, epsilon_schedule)
+        # sparse=True keeps a ChunkedQTable that only allocates rows of visited states, for very large boards
+        self.dtype = dtype
+        self.sparse = sparse
+        self.q_table = make_q_table(state_space_size, action_space_size, dtype, sparse)
+
+    def train(self, env, total_episodes=None, max_steps_per_episode=None, seed=None, backend="reference",
+              callbacks=None, profiler=None, early_stopping=None):
         """
         Train the Q-learning agent in the given environment.
+        backend="fast" runs the same updates on plain Python lists; with a fixed seed both backends
+        produce the same Q-table.
+        callbacks (see environment.instrumentation) receive a record after every episode; a SamplingProfiler
+        passed as profiler times a sample of the steps of the reference backend.
+        An EarlyStopping ends training once it detects convergence; episodes_trained tells how many episodes ran.
         """
+        _check_training_options(backend, profiler)
         if total_episodes is None:
             total_episodes = int((env.board_size[0]*env.board_size[1])/16*1000)  # +env.board_size[0]/4*1000)
-        if max_steps_per_episode is None:
-            max_steps_per_episode = env.board_size[0]*env.board_size[1]
+        max_steps_per_episode = _step_limit(env, max_steps_per_episode)
+        epsilons, sampler, monitor = self._begin_training(env, total_episodes, seed, callbacks, early_stopping)
+
         # Reset the Q-table for a new environment
-        self.q_table = np.zeros_like(self.q_table)
-        current_state = env.reset()
+        self.q_table = make_q_table(*_table_shape(env), self.dtype, self.sparse)
+        if backend == "fast":
+            q_rows = self._fast_rows()
+            on_episode = _episode_hook(env, monitor, early_stopping, lambda: self._fast_policy(q_rows))
+            self.steps_trained = fast_train.q_learning(env, q_rows, epsilons[:-1].tolist(), sampler,
+                                                       self.learning_rate, self.gamma, max_steps_per_episode,
+                                                       on_episode)
+            self.q_table = self._from_fast_rows(q_rows)
+            self._finish_training(epsilons, total_episodes, monitor, early_stopping)
+            return
+
+        self.steps_trained = 0
+        on_episode = _episode_hook(env, monitor, early_stopping, lambda: self.q_table.argmax(axis=1))
         for episode in range(total_episodes):
+            self.epsilon = epsilons[episode]
             state = env.reset()
+            episode_return, max_delta = 0, 0.0
             # current_position = 0
             for step in range(max_steps_per_episode):
-                if random.uniform(0, 1) > self.epsilon:
+                timed = profiler is not None and profiler.sample()
+                if timed:
+                    started = time.perf_counter()
+                explore, random_action = sampler.next()
+                if explore > self.epsilon:
                     action_index = np.argmax(self.q_table[state, :])  # Best action from Q-table
                 else:
-                    action_index = random.randint(0, len(env.action_space) - 1)  # Random action
-
-                action = env.action_space[action_index]  # Map action index to action string
+                    action_index = random_action  # Random action
+                if timed:
+                    selected = time.perf_counter()
 
-                next_state, reward, done = env.step(action)
+                next_state, reward, done = env.step_index(action_index)
                 # current_position = env._state_to_index(next_state)
+                if timed:
+                    stepped = time.perf_counter()
 
                 # Update Q-value
-                self.q_table[state, action_index] += self.learning_rate * (
+                delta = self.learning_rate * (
                         reward + self.gamma * np.max(self.q_table[next_state, :]) - self.q_table[state, action_index]
                 )
+                self.q_table[state, action_index] += delta
+                if timed:
+                    profiler.add(selected - started, stepped - selected, time.perf_counter() - stepped)
+                if on_episode is not None:
+                    episode_return += reward
+                    max_delta = max(max_delta, abs(float(delta)))
 
                 if done:
                     break
 
                 state = next_state
+            self.steps_trained += step + 1
+            if on_episode is not None and on_episode(step + 1, episode_return, max_delta, self.epsilon):
+                break
 
-            # Decay epsilon after each episode
-            self.epsilon = max(
-                self.min_epsilon,
-                self.max_epsilon * np.exp(-self.decay_rate * episode)
-            )
+        self._finish_training(epsilons, total_episodes, monitor, early_stopping)
 
-    def select_action(self, state):
-        """
-        Select the best action for a given state based on the Q-table.
-        """
-        return np.argmax(self.q_table[state, :])
 
-class SarsaAgent:
+class SarsaAgent(_LearningAgent):
     def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.3,
-                 gamma=0.99, epsilon=1, decay_rate=0.001):
-        self.q_table = np.zeros((state_space_size, action_space_size))
-        self.learning_rate = learning_rate
-        self.gamma = gamma
-        self.epsilon = epsilon
-        self.decay_rate = decay_rate
-        self.max_epsilon = 1
-        self.min_epsilon = 0.01
+                 gamma=0.99, epsilon=1, decay_rate=0.001, dtype=np.float64, sparse=False, epsilon_schedule=None):
+        super().__init__(learning_rate, gamma, epsilon, decay_rate, epsilon_schedule)
+        self.dtype = dtype
+        self.sparse = sparse
+        self.q_table = make_q_table(state_space_size, action_space_size, dtype, sparse)
         self.action_space_size = action_space_size
 
-    def train(self, env, total_episodes=None, max_steps_per_episode=None):
+    def train(self, env, total_episodes=None, max_steps_per_episode=None, seed=None, backend="reference",
+              callbacks=None, profiler=None, early_stopping=None):
         """
         Train the SARSA agent in the given environment.
+        backend="fast" runs the same updates on plain Python lists; with a fixed seed both backends
+        produce the same Q-table. callbacks, profiler and early_stopping work as in QLearningAgent.train.
         """
+        _check_training_options(backend, profiler)
         if total_episodes is None:
-            total_episodes = int((env.board_size[0] * env.board_size[1]) / 16 * self.action_space_size * 1000)
-        if max_steps_per_episode is None:
-            max_steps_per_episode = env.board_size[0] * env.board_size[1]
+            total_episodes = int((env.board_size[0] * env.board_size[1]) / 16 * len(env.action_space) * 1000)
+        max_steps_per_episode = _step_limit(env, max_steps_per_episode)
+        epsilons, sampler, monitor = self._begin_training(env, total_episodes, seed, callbacks, early_stopping)
 
-        self.q_table = np.zeros_like(self.q_table)
+        self.q_table = make_q_table(*_table_shape(env), self.dtype, self.sparse)
+        if backend == "fast":
+            q_rows = self._fast_rows()
+            on_episode = _episode_hook(env, monitor, early_stopping, lambda: self._fast_policy(q_rows))
+            self.steps_trained = fast_train.sarsa(env, q_rows, epsilons[:-1].tolist(), sampler,
+                                                  self.learning_rate, self.gamma, max_steps_per_episode, on_episode)
+            self.q_table = self._from_fast_rows(q_rows)
+            self._finish_training(epsilons, total_episodes, monitor, early_stopping)
+            return
+
+        self.steps_trained = 0
+        on_episode = _episode_hook(env, monitor, early_stopping, lambda: self.q_table.argmax(axis=1))
         for episode in range(total_episodes):
+            self.epsilon = epsilons[episode]
             state = env.reset()
-            action_index = self._choose_action(state, env)
+            action_index = self._choose_action(state, sampler)
+            episode_return, max_delta = 0, 0.0
 
             for step in range(max_steps_per_episode):
-                action = env.action_space[action_index]
-                next_state, reward, done = env.step(action)
-                next_action_index = self._choose_action(next_state, env)
+                timed = profiler is not None and profiler.sample()
+                if timed:
+                    started = time.perf_counter()
+                next_state, reward, done = env.step_index(action_index)
+                if timed:
+                    stepped = time.perf_counter()
+                next_action_index = self._choose_action(next_state, sampler)
+                if timed:
+                    selected = time.perf_counter()
 
                 # Update Q-value using SARSA formula
-                self.q_table[state, action_index] += self.learning_rate * (
+                delta = self.learning_rate * (
                         reward + self.gamma * self.q_table[next_state, next_action_index] -
                         self.q_table[state, action_index]
                 )
+                self.q_table[state, action_index] += delta
+                if timed:
+                    profiler.add(selected - stepped, stepped - started, time.perf_counter() - selected)
+                if on_episode is not None:
+                    episode_return += reward
+                    max_delta = max(max_delta, abs(float(delta)))
 
                 if done:
                     break
 
                 state = next_state
                 action_index = next_action_index
+            self.steps_trained += step + 1
+            if on_episode is not None and on_episode(step + 1, episode_return, max_delta, self.epsilon):
+                break
+
+        self._finish_training(epsilons, total_episodes, monitor, early_stopping)
+
+
+TRACE_TYPES = ('replacing', 'accumulating')
+
+
+class _LambdaAgent(_LearningAgent):
+    """
+    Shared training loop of the eligibility-trace agents. Traces live in a dict keyed by (state, action) that
+    only holds pairs visited in the current episode; traces that decay below trace_cutoff are dropped, so an
+    update costs O(recently visited pairs) instead of O(S*A).
+    """
 
+    # Watkins's Q(lambda) bootstraps from the greedy action and cuts the traces after exploratory actions
+    off_policy = False
 
-# Decay epsilon after each episode
-            self.epsilon = max(
-                self.min_epsilon,
-                self.max_epsilon * np.exp(-self.decay_rate * episode)
-            )
+    def __init__(self, state_space_size, action_space_size, learning_rate, gamma, epsilon, decay_rate,
+                 trace_decay, trace_type, trace_cutoff, epsilon_schedule):
+        if trace_type not in TRACE_TYPES:
+            raise ValueError(f"Unknown trace type '{trace_type}', use one of {TRACE_TYPES}.")
+        super().__init__(learning_rate, gamma, epsilon, decay_rate, epsilon_schedule)
+        self.q_table = np.zeros((state_space_size, action_space_size))
+        self.trace_decay = trace_decay
+        self.trace_type = trace_type
+        self.trace_cutoff = trace_cutoff
 
-    def _choose_action(self, state, env):
+    def train(self, env, total_episodes=None, max_steps_per_episode=None, seed=None, backend="reference",
+              callbacks=None, profiler=None, early_stopping=None):
         """
-        Choose an action using epsilon-greedy policy.
+        Train the agent in the given environment. Both backends run the same loop; callbacks, profiler and
+        early_stopping work as in QLearningAgent.train.
+        """
+        _check_training_options(backend, None)
+        if total_episodes is None:
+            total_episodes = int((env.board_size[0] * env.board_size[1]) / 16 * 1000)
+        max_steps_per_episode = _step_limit(env, max_steps_per_episode)
+        epsilons, sampler, monitor = self._begin_training(env, total_episodes, seed, callbacks, early_stopping)
+        on_episode = _episode_hook(env, monitor, early_stopping, lambda: self.q_table.argmax(axis=1))
+
+        self.q_table = np.zeros(_table_shape(env))
+        self.steps_trained = 0
+        q_table = self.q_table
+        action_count = q_table.shape[1]
+        decay = self.gamma * self.trace_decay
+        replacing = self.trace_type == 'replacing'
+        for episode in range(total_episodes):
+            self.epsilon = epsilons[episode]
+            traces = {}
+            state = env.reset()
+            action_index = self._choose_action(state, sampler)
+            episode_return, max_delta = 0, 0.0
+
+            for step in range(max_steps_per_episode):
+                timed = profiler is not None and profiler.sample()
+                if timed:
+                    started = time.perf_counter()
+                next_state, reward, done = env.step_index(action_index)
+                if timed:
+                    stepped = time.perf_counter()
+                next_action_index = self._choose_action(next_state, sampler)
+                if timed:
+                    selected = time.perf_counter()
+
+                next_values = q_table[next_state]
+                if self.off_policy:
+                    # Bootstrap from the greedy action, preferring the chosen one when it ties with the best
+                    target_action = next_action_index
+                    if next_values[next_action_index] != next_values.max():
+                        target_action = int(next_values.argmax())
+                else:
+                    target_action = next_action_index
+                td_error = reward + self.gamma * next_values[target_action] - q_table[state, action_index]
+
+                if replacing:
+                    for other_action in range(action_count):
+                        traces.pop((state, other_action), None)
+                    traces[(state, action_index)] = 1.0
+                else:
+                    traces[(state, action_index)] = traces.get((state, action_index), 0.0) + 1.0
+                step_size = self.learning_rate * td_error
+                for (trace_state, trace_action), trace in traces.items():
+                    q_table[trace_state, trace_action] += step_size * trace
+                if timed:
+                    profiler.add(selected - stepped, stepped - started, time.perf_counter() - selected)
+                if on_episode is not None:
+                    episode_return += reward
+                    max_delta = max(max_delta, abs(float(step_size)) * max(traces.values()))
+
+                if done:
+                    break
+
+                if self.off_policy and target_action != next_action_index:
+                    traces.clear()  # An exploratory action ends the greedy trajectory the traces credit
+                else:
+                    traces = {pair: trace * decay for pair, trace in traces.items()
+                              if trace * decay >= self.trace_cutoff}
+                state = next_state
+                action_index = next_action_index
+            self.steps_trained += step + 1
+            if on_episode is not None and on_episode(step + 1, episode_return, max_delta, self.epsilon):
+                break
+
+        self._finish_training(epsilons, total_episodes, monitor, early_stopping)
+
+
+class QLambdaAgent(_LambdaAgent):
+    """
+    Watkins's Q(lambda): Q-learning whose updates also reach back along the recent greedy trajectory.
+    """
+    off_policy = True
+
+    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.2,
+                 gamma=0.9, epsilon=1, decay_rate=0.001, trace_decay=0.9, trace_type='replacing', trace_cutoff=1e-4,
+                 epsilon_schedule=None):
+        super().__init__(state_space_size, action_space_size, learning_rate, gamma, epsilon, decay_rate,
+                         trace_decay, trace_type, trace_cutoff, epsilon_schedule)
+
+
+class SarsaLambdaAgent(_LambdaAgent):
+    """
+    SARSA(lambda): on-policy SARSA with eligibility traces over the recent state-action pairs.
+    """
+
+    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.3,
+                 gamma=0.99, epsilon=1, decay_rate=0.001, trace_decay=0.9, trace_type='replacing', trace_cutoff=1e-4,
+                 epsilon_schedule=None):
+        super().__init__(state_space_size, action_space_size, learning_rate, gamma, epsilon, decay_rate,
+                         trace_decay, trace_type, trace_cutoff, epsilon_schedule)
+
+
+class DynaQAgent(_LearningAgent):
+    """
+    Dyna-Q: Q-learning that also replays transitions from a learned model of the board.
+
+    The model is a set of preallocated arrays indexed by [state, action] that hold the last observed next
+    state and reward. After every real step the agent makes planning_steps extra updates, on uniformly drawn
+    observed pairs, or with prioritized=True on the pairs of a bounded priority queue that is refilled from the
+    predecessors of each updated state (prioritized sweeping).
+    """
+
+    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), learning_rate=0.2,
+                 gamma=0.9, epsilon=1, decay_rate=0.001, planning_steps=5, prioritized=False,
+                 priority_threshold=1e-4, queue_size=1000, epsilon_schedule=None):
+        super().__init__(learning_rate, gamma, epsilon, decay_rate, epsilon_schedule)
+        self.q_table = np.zeros((state_space_size, action_space_size))
+        # Counts may arrive as floats from a sweep grid or a JSON job
+        self.planning_steps = int(planning_steps)
+        self.prioritized = prioritized
+        self.priority_threshold = priority_threshold
+        self.queue_size = int(queue_size)
+        self.planning_updates = 0
+
+    def _reset_model(self):
+        pair_count = self.q_table.size
+        # Next state and reward of every observed pair, flattened as state * action_count + action
+        self._model_next_state = np.full(pair_count, -1, dtype=np.int64)
+        self._model_reward = np.zeros(pair_count)
+        # Observed pairs in order of discovery, for uniform sampling
+        self._observed = np.empty(pair_count, dtype=np.int64)
+        self._observed_count = 0
+        # Predecessor lists as linked lists through the pairs: head per state, next per pair
+        self._predecessor_head = np.full(self.q_table.shape[0], -1, dtype=np.int64)
+        self._predecessor_next = np.full(pair_count, -1, dtype=np.int64)
+        # Priority each pair is queued with, 0 when it is not queued
+        self._queued_priority = np.zeros(pair_count)
+        self._queue = []
+
+    def train(self, env, total_episodes=None, max_steps_per_episode=None, seed=None, backend="reference",
+              callbacks=None, profiler=None, early_stopping=None):
         """
-        if random.random() > self.epsilon:
-            return np.argmax(self.q_table[state, :])
+        Train the agent in the given environment. Both backends run the same loop; callbacks, profiler and
+        early_stopping work as in QLearningAgent.train, with planning counted as update time.
+        """
+        _check_training_options(backend, None)
+        if total_episodes is None:
+            total_episodes = int((env.board_size[0] * env.board_size[1]) / 16 * 1000)
+        max_steps_per_episode = _step_limit(env, max_steps_per_episode)
+        epsilons, sampler, monitor = self._begin_training(env, total_episodes, seed, callbacks, early_stopping)
+        # Planning draws from its own stream so it does not shift the exploration decisions
+        planning_rng = np.random.default_rng(None if seed is None else [seed, 1])
+        on_episode = _episode_hook(env, monitor, early_stopping, lambda: self.q_table.argmax(axis=1))
+
+        self.q_table = np.zeros(_table_shape(env))
+        self.steps_trained = 0
+        self.planning_updates = 0
+        self._reset_model()
+        q_table = self.q_table
+        action_count = q_table.shape[1]
+        uniforms, position = [], 0
+        for episode in range(total_episodes):
+            self.epsilon = epsilons[episode]
+            state = env.reset()
+            episode_return, max_delta = 0, 0.0
+            for step in range(max_steps_per_episode):
+                timed = profiler is not None and profiler.sample()
+                if timed:
+                    started = time.perf_counter()
+                explore, random_action = sampler.next()
+                if explore > self.epsilon:
+                    action_index = int(np.argmax(q_table[state, :]))
+                else:
+                    action_index = random_action
+                if timed:
+                    selected = time.perf_counter()
+
+                next_state, reward, done = env.step_index(action_index)
+                if timed:
+                    stepped = time.perf_counter()
+
+                delta = self.learning_rate * (reward + self.gamma * q_table[next_state].max() -
+                                              q_table[state, action_index])
+                q_table[state, action_index] += delta
+                pair = state * action_count + action_index
+                self._remember(pair, next_state, reward)
+                if self.prioritized:
+                    self._queue_pair(pair, abs(delta) / self.learning_rate)
+                    self._sweep(action_count)
+                else:
+                    if position + self.planning_steps > len(uniforms):
+                        uniforms, position = planning_rng.random(1 << 16).tolist(), 0
+                    for _ in range(self.planning_steps):
+                        planned = int(self._observed[int(uniforms[position] * self._observed_count)])
+                        position += 1
+                        self._plan(planned, action_count)
+                if timed:
+                    profiler.add(selected - started, stepped - selected, time.perf_counter() - stepped)
+                if on_episode is not None:
+                    episode_return += reward
+                    max_delta = max(max_delta, abs(float(delta)))
+
+                if done:
+                    break
+                state = next_state
+            self.steps_trained += step + 1
+            if on_episode is not None and on_episode(step + 1, episode_return, max_delta, self.epsilon):
+                break
+
+        self._finish_training(epsilons, total_episodes, monitor, early_stopping)
+
+    def _remember(self, pair, next_state, reward):
+        if self._model_next_state[pair] < 0:
+            self._observed[self._observed_count] = pair
+            self._observed_count += 1
+            self._predecessor_next[pair] = self._predecessor_head[next_state]
+            self._predecessor_head[next_state] = pair
+        self._model_next_state[pair] = next_state
+        self._model_reward[pair] = reward
+
+    def _plan(self, pair, action_count):
+        # One Q-learning update from the model; returns the size of the change
+        state, action_index = divmod(pair, action_count)
+        next_state = self._model_next_state[pair]
+        delta = self.learning_rate * (self._model_reward[pair] + self.gamma * self.q_table[next_state].max() -
+                                      self.q_table[state, action_index])
+        self.q_table[state, action_index] += delta
+        self.planning_updates += 1
+        return delta
+
+    def _queue_pair(self, pair, priority):
+        # Keep only the highest priority per pair; stale heap entries are skipped when popped
+        if priority <= self.priority_threshold or priority <= self._queued_priority[pair]:
+            return
+        self._queued_priority[pair] = priority
+        heapq.heappush(self._queue, (-priority, pair))
+        if len(self._queue) > 2 * self.queue_size:
+            # Drop the lowest priorities once the heap holds twice the bound
+            kept = heapq.nsmallest(self.queue_size, self._queue)
+            for negative_priority, dropped in set(self._queue) - set(kept):
+                if -negative_priority == self._queued_priority[dropped]:
+                    self._queued_priority[dropped] = 0.0
+            self._queue = kept
+            heapq.heapify(self._queue)
+
+    def _sweep(self, action_count):
+        updates = 0
+        while self._queue and updates < self.planning_steps:
+            negative_priority, pair = heapq.heappop(self._queue)
+            if -negative_priority != self._queued_priority[pair]:
+                continue
+            self._queued_priority[pair] = 0.0
+            self._plan(pair, action_count)
+            updates += 1
+            # The value of this pair's state changed, so its predecessors may now be worth updating
+            state = pair // action_count
+            state_value = self.q_table[state].max()
+            predecessor = self._predecessor_head[state]
+            while predecessor >= 0:
+                predecessor_state, predecessor_action = divmod(int(predecessor), action_count)
+                error = (self._model_reward[predecessor] + self.gamma * state_value -
+                         self.q_table[predecessor_state, predecessor_action])
+                self._queue_pair(int(predecessor), abs(error))
+                predecessor = self._predecessor_next[predecessor]
+
+
+class PlanningAgent:
+    def __init__(self, state_space_size, action_space_size=len(DEFAULT_CONFIG['action_space']), gamma=0.99,
+                 method='value_iteration', tolerance=0.0, max_iterations=None):
+        if method not in ('value_iteration', 'policy_iteration'):
+            raise ValueError(f"Unknown planning method '{method}', use 'value_iteration' or 'policy_iteration'.")
+        self.q_table = np.zeros((state_space_size, action_space_size))
+        self.gamma = gamma
+        self.method = method
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.iterations = 0
+
+    def train(self, env, total_episodes=None, max_steps_per_episode=None, seed=None, backend=None, callbacks=None,
+              profiler=None, early_stopping=None):
+        """
+        Solve the environment exactly from its transition table instead of sampling episodes.
+        The remaining arguments are accepted for interface compatibility with the learning agents and ignored.
+        """
+        table = env.transition_table()
+        if self.method == 'value_iteration':
+            self.q_table = self._value_iteration(table)
         else:
-            return random.randint(0, len(env.action_space) - 1)
+            self.q_table = self._policy_iteration(table)
+
+    def _q_values(self, table, values):
+        # Terminal transitions do not bootstrap from the state they land in
+        return table.reward + self.gamma * np.where(table.done, 0.0, values[table.next_state])
+
+    def _value_iteration(self, table):
+        state_count = table.next_state.shape[0]
+        max_iterations = self.max_iterations if self.max_iterations is not None else state_count + 1
+        values = np.zeros(state_count)
+        q_values = self._q_values(table, values)
+        for self.iterations in range(1, max_iterations + 1):
+            new_values = q_values.max(axis=1)
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            q_values = self._q_values(table, values)
+            # Values spread one cell per sweep, so the default tolerance of 0 waits for an exact fixed point
+            if delta <= self.tolerance:
+                break
+        return q_values
+
+    def _evaluate_policy(self, table, policy):
+        """
+        Exact discounted return of a deterministic policy from every state, by pointer doubling.
+        """
+        states = np.arange(table.next_state.shape[0])
+        next_state = table.next_state[states, policy]
+        values = table.reward[states, policy].astype(float)
+        discount = np.where(table.done[states, policy], 0.0, self.gamma)
+        # After k rounds values hold the return of the first 2**k steps and discount the weight of the rest
+        for _ in range(64):
+            if not discount.any():
+                break
+            values = values + discount * values[next_state]
+            discount = discount * discount[next_state]
+            next_state = next_state[next_state]
+        return values
+
+    def _policy_iteration(self, table):
+        state_count = table.next_state.shape[0]
+        states = np.arange(state_count)
+        max_iterations = self.max_iterations if self.max_iterations is not None else state_count + 1
+        policy = np.zeros(state_count, dtype=np.int64)
+        q_values = self._q_values(table, self._evaluate_policy(table, policy))
+        for self.iterations in range(1, max_iterations + 1):
+            # Keep the current action unless another one is strictly better, so ties cannot cycle
+            best = q_values.argmax(axis=1)
+            new_policy = np.where(q_values[states, policy] >= q_values[states, best], policy, best)
+            if np.array_equal(new_policy, policy):
+                break
+            policy = new_policy
+            q_values = self._q_values(table, self._evaluate_policy(table, policy))
+        return q_values
+
+    def score(self, agent, env):
+        """
+        Fraction of open, non-goal cells where the agent's greedy action is optimal.
+        Call after train() on the same environment.
+        """
+        optimal = self.q_table.max(axis=1)
+        states = [env.state_to_index((row, col))
+                  for row in range(env.board_size[0]) for col in range(env.board_size[1])
+                  if (row, col) not in env.obstacles and (row, col) != env.end]
+        if not states:
+            return 1.0
+        chosen = self.q_table[states, [agent.select_action(state) for state in states]]
+        return float(np.mean(np.isclose(chosen, optimal[states])))
 
     def select_action(self, state):
         """
         Select the best action for a given state based on the Q-table.
         """
-        return np.argmax(self.q_table[state, :])
\ No newline at end of file
+        return np.argmax(self.q_table[state, :])
+
+
+# Agents selectable by name, e.g. by the sweep runner and the web job queue
+AGENTS = {
+    'q_learning': QLearningAgent,
+    'sarsa': SarsaAgent,
+    'q_lambda': QLambdaAgent,
+    'sarsa_lambda': SarsaLambdaAgent,
+    'dyna_q': DynaQAgent,
+    'planning': PlanningAgent,
+}
@@ -0,0 +1,6 @@
+"""
+Cell codes of Environment.board_grid(), kept apart from the renderers so the environment loads without colorama.
+"""
+CELL_OPEN, CELL_OBSTACLE, CELL_GOAL, CELL_AGENT, CELL_VISITED = range(5)
+# The letter Environment.initialize_board uses for each code
+CELL_SYMBOLS = 'OXGH*'
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class EarlyStopping:
+    """
+    Convergence test for the learning agents' train(early_stopping=...).
+
+    Training stops once the greedy policy has stayed the same and no Q-value moved by tolerance or more for
+    window consecutive episodes and a greedy rollout then reaches the goal within env.max_steps, or, when
+    rollout_every is set, once a greedy rollout run every rollout_every episodes reaches the goal in the fewest
+    possible steps. A policy that has settled without ever seeing the goal is not converged, so a stable window
+    whose rollout fails only starts the next window. After training, episodes holds the number of episodes run
+    and reason is 'stable', 'optimal' or None when the whole budget was used; either reason means the final
+    greedy policy reaches the goal.
+    """
+
+    def __init__(self, window=100, tolerance=1e-3, rollout_every=None, min_episodes=0):
+        self.window = window
+        self.tolerance = tolerance
+        self.rollout_every = rollout_every
+        self.min_episodes = min_episodes
+        self.episodes = 0
+        self.reason = None
+        self._optimal_steps = None
+        self._stable = 0
+        self._policy = None
+
+    def begin(self, env):
+        self.episodes = 0
+        self.reason = None
+        self._stable = 0
+        self._policy = None
+        self._optimal_steps = env.shortest_path_length() if self.rollout_every else None
+
+    @property
+    def stopped(self) -> bool:
+        return self.reason is not None
+
+    def update(self, env, q_delta, greedy_policy) -> bool:
+        """
+        Account for one finished episode and return True when training should stop.
+        greedy_policy is a callable returning the current greedy action of every state; it is only called
+        when needed.
+        """
+        self.episodes += 1
+        policy = None
+        if q_delta < self.tolerance:
+            policy = greedy_policy()
+            if self._policy is not None and np.array_equal(policy, self._policy):
+                self._stable += 1
+            else:
+                self._stable = 1
+                self._policy = policy
+        else:
+            self._stable = 0
+            self._policy = None
+        if self.episodes < self.min_episodes:
+            return False
+
+        if self._optimal_steps is not None and self.episodes % self.rollout_every == 0:
+            # Nothing shorter than the shortest path exists, so reaching the goal within it is optimal
+            if self._reaches_goal(env, policy if policy is not None else greedy_policy(), self._optimal_steps):
+                self.reason = 'optimal'
+                return True
+        if self._stable >= self.window:
+            if self._reaches_goal(env, self._policy, env.max_steps):
+                self.reason = 'stable'
+            else:
+                self._stable = 0
+        return self.stopped
+
+    @staticmethod
+    def _reaches_goal(env, policy, max_steps):
+        state = env.reset()
+        for step in range(max_steps):
+            state, reward, done = env.step_index(int(policy[state]))
+            if done:
+                return not env.truncated
+        return False
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class ExplorationSampler:
+    """
+    Pre-draws exploration randomness in blocks from one seeded np.random.Generator.
+
+    Every epsilon-greedy decision consumes one (uniform, random_action) pair, whether or not it explores,
+    so two training loops that make the same decisions see exactly the same stream.
+    """
+
+    def __init__(self, action_count, seed=None, block_size=1 << 16):
+        self.action_count = action_count
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+        self._uniforms = []
+        self._actions = []
+        self._position = 0
+
+    def next_block(self):
+        """
+        Draw a fresh block and return it as two Python lists (uniforms, random_actions).
+        """
+        uniforms = self.rng.random(self.block_size).tolist()
+        actions = self.rng.integers(0, self.action_count, self.block_size).tolist()
+        return uniforms, actions
+
+    def next(self):
+        """
+        Return the next (uniform, random_action) pair.
+        """
+        if self._position == len(self._uniforms):
+            self._uniforms, self._actions = self.next_block()
+            self._position = 0
+        position = self._position
+        self._position += 1
+        return self._uniforms[position], self._actions[position]
+
+
+def epsilon_curve(initial_epsilon, max_epsilon, min_epsilon, decay_rate, total_episodes):
+    """
+    Epsilon used in each episode: the initial value first, then max_epsilon * exp(-decay_rate * (episode - 1))
+    floored at min_epsilon, matching the per-episode decay the agents apply.
+    """
+    curve = np.empty(total_episodes)
+    if total_episodes:
+        curve[0] = initial_epsilon
+        curve[1:] = np.maximum(min_epsilon, max_epsilon * np.exp(-decay_rate * np.arange(total_episodes - 1)))
+    return curve
+
+
+class EpsilonSchedule:
+    """
+    Exploration rate per episode, computed for a whole training run at once. Subclasses implement values().
+    """
+
+    def values(self, episode_count) -> np.ndarray:
+        """Epsilon of episodes 0 .. episode_count - 1 as one float array."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        arguments = ", ".join(f"{name}={value!r}" for name, value in vars(self).items())
+        return f"{type(self).__name__}({arguments})"
+
+
+class ExponentialSchedule(EpsilonSchedule):
+    """
+    The agents' default: initial first, then maximum * exp(-decay_rate * (episode - 1)) floored at minimum.
+    """
+
+    def __init__(self, initial=1.0, maximum=1.0, minimum=0.01, decay_rate=0.001):
+        self.initial = initial
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decay_rate = decay_rate
+
+    def values(self, episode_count) -> np.ndarray:
+        return epsilon_curve(self.initial, self.maximum, self.minimum, self.decay_rate, episode_count)
+
+
+class LinearSchedule(EpsilonSchedule):
+    """
+    Straight line from start to end over decay_episodes episodes, then constant at end.
+    """
+
+    def __init__(self, start=1.0, end=0.01, decay_episodes=1000):
+        self.start = start
+        self.end = end
+        self.decay_episodes = decay_episodes
+
+    def values(self, episode_count) -> np.ndarray:
+        progress = np.minimum(np.arange(episode_count) / max(self.decay_episodes, 1), 1.0)
+        return self.start + (self.end - self.start) * progress
+
+
+class StepSchedule(EpsilonSchedule):
+    """
+    start multiplied by factor after every step_episodes episodes, floored at minimum.
+    """
+
+    def __init__(self, start=1.0, factor=0.5, step_episodes=500, minimum=0.01):
+        self.start = start
+        self.factor = factor
+        self.step_episodes = step_episodes
+        self.minimum = minimum
+
+    def values(self, episode_count) -> np.ndarray:
+        steps = np.arange(episode_count) // max(self.step_episodes, 1)
+        return np.maximum(self.minimum, self.start * np.power(float(self.factor), steps))
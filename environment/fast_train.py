@@ -0,0 +1,161 @@
+"""
+Tabular training kernels on plain Python lists.
+
+The Q-table is held as one short list per state and the transition table as one (next_state, reward, done)
+tuple per state-action pair, and exploration randomness comes in pre-drawn blocks, so a step costs a handful of
+list lookups instead of several NumPy calls. Given the same sampler seed and epsilon curve the kernels make
+exactly the same floating-point updates as the reference loops in agent.py.
+"""
+from collections import defaultdict
+
+from environment import rl_environment
+
+
+class _LazyTransitionRows(dict):
+    """
+    Transition rows built on first visit from the obstacle and reward grids, for boards whose full table would
+    not fit in memory. Rows hold the same tuples as the compiled table.
+    """
+
+    def __init__(self, env):
+        super().__init__()
+        self.lookup = rl_environment._GridStepLookup(env)
+        self.action_count = len(env.action_space)
+
+    def __missing__(self, state):
+        first = state * self.action_count
+        row = self[state] = [self.lookup[index] for index in range(first, first + self.action_count)]
+        return row
+
+
+def _transition_rows(env, q_rows):
+    # Sparse Q-tables and boards past STEP_LOOKUP_LIMIT only pay for the states an episode visits
+    if isinstance(q_rows, dict) or \
+            env.board_size[0] * env.board_size[1] * len(env.action_space) > rl_environment.STEP_LOOKUP_LIMIT:
+        return _LazyTransitionRows(env)
+    table = env.transition_table()
+    return [list(zip(next_states, rewards, dones)) for next_states, rewards, dones in
+            zip(table.next_state.tolist(), table.reward.tolist(), table.done.tolist())]
+
+
+def _greedy_cache(q_rows):
+    """
+    (best_values, greedy): max(row) and its first index for every row of q_rows, in the same container type.
+    Rows a sparse table has not created yet are zeroed, so they default to 0.0 and action 0.
+    """
+    if isinstance(q_rows, dict):
+        best_values = defaultdict(float, {state: max(row) for state, row in q_rows.items()})
+        greedy = defaultdict(int, {state: row.index(best_values[state]) for state, row in q_rows.items()})
+        return best_values, greedy
+    best_values = [max(row) for row in q_rows]
+    return best_values, [row.index(best) for row, best in zip(q_rows, best_values)]
+
+
+def q_learning(env, q_rows, epsilons, sampler, learning_rate, gamma, max_steps_per_episode, on_episode=None):
+    """
+    Run one Q-learning episode per entry of epsilons, updating q_rows (a list of per-state lists) in place.
+    Returns the total number of environment steps taken. on_episode, if given, is called after every episode
+    with (steps, episode_return, max_q_delta, epsilon) and stops training by returning True.
+    """
+    transitions = _transition_rows(env, q_rows)
+    # Greedy value and action of every state, kept up to date so most steps need no max() over a row
+    best_values, greedy = _greedy_cache(q_rows)
+    record = on_episode is not None
+    start_state = env.state_to_index(env.start)
+    uniforms, random_actions = [], []
+    position = 0
+    total_steps = 0
+
+    for epsilon in epsilons:
+        state = start_state
+        row = q_rows[state]
+        episode_return, max_delta = 0, 0.0
+        for step in range(max_steps_per_episode):
+            if position == len(uniforms):
+                uniforms, random_actions = sampler.next_block()
+                position = 0
+            if uniforms[position] > epsilon:
+                action_index = greedy[state]  # First maximum, like np.argmax
+            else:
+                action_index = random_actions[position]
+            position += 1
+
+            next_state, reward, done = transitions[state][action_index]
+            delta = learning_rate * (reward + gamma * best_values[next_state] - row[action_index])
+            row[action_index] += delta
+            value = row[action_index]
+            best = greedy[state]
+            if action_index == best:
+                if value < best_values[state]:
+                    # The greedy action lost value, another one may now be the first maximum
+                    best_values[state] = best_value = max(row)
+                    greedy[state] = row.index(best_value)
+                else:
+                    best_values[state] = value
+            elif value > best_values[state] or (value == best_values[state] and action_index < best):
+                best_values[state] = value
+                greedy[state] = action_index
+            if record:
+                episode_return += reward
+                if delta > max_delta or -delta > max_delta:
+                    max_delta = abs(delta)
+            if done:
+                break
+            state = next_state
+            row = q_rows[state]
+        total_steps += step + 1
+        if record and on_episode(step + 1, episode_return, max_delta, epsilon):
+            break
+    return total_steps
+
+
+def sarsa(env, q_rows, epsilons, sampler, learning_rate, gamma, max_steps_per_episode, on_episode=None):
+    """
+    Run one SARSA episode per entry of epsilons, updating q_rows (a list of per-state lists) in place.
+    Returns the total number of environment steps taken. on_episode is called like in q_learning.
+    """
+    transitions = _transition_rows(env, q_rows)
+    record = on_episode is not None
+    start_state = env.state_to_index(env.start)
+    uniforms, random_actions = [], []
+    position = 0
+    total_steps = 0
+
+    for epsilon in epsilons:
+        state = start_state
+        row = q_rows[state]
+        episode_return, max_delta = 0, 0.0
+        if position == len(uniforms):
+            uniforms, random_actions = sampler.next_block()
+            position = 0
+        if uniforms[position] > epsilon:
+            action_index = row.index(max(row))
+        else:
+            action_index = random_actions[position]
+        position += 1
+
+        for step in range(max_steps_per_episode):
+            next_state, reward, done = transitions[state][action_index]
+            next_row = q_rows[next_state]
+            if position == len(uniforms):
+                uniforms, random_actions = sampler.next_block()
+                position = 0
+            if uniforms[position] > epsilon:
+                next_action_index = next_row.index(max(next_row))
+            else:
+                next_action_index = random_actions[position]
+            position += 1
+
+            delta = learning_rate * (reward + gamma * next_row[next_action_index] - row[action_index])
+            row[action_index] += delta
+            if record:
+                episode_return += reward
+                if delta > max_delta or -delta > max_delta:
+                    max_delta = abs(delta)
+            if done:
+                break
+            state, row, action_index = next_state, next_row, next_action_index
+        total_steps += step + 1
+        if record and on_episode(step + 1, episode_return, max_delta, epsilon):
+            break
+    return total_steps
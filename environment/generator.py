@@ -0,0 +1,90 @@
+"""
+Bulk procedural generation of environment layouts for curricula and benchmark suites.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from database.layout import EncodedLayout
+from environment.rl_environment import sample_obstacle_cells
+
+# Below this many layouts the process start-up costs more than it saves
+PARALLEL_THRESHOLD = 2000
+
+
+def _generate_chunk(seed_sequences, sizes, densities):
+    layouts = []
+    for seed_sequence in seed_sequences:
+        rng = np.random.default_rng(seed_sequence)
+        rows, cols = sizes[rng.integers(len(sizes))]
+        density = densities[rng.integers(len(densities))]
+        cell_count = rows * cols
+        # Start and goal sit in opposite corners, obstacles are drawn without replacement off a reserved path
+        start_cell, end_cell = 0, cell_count - 1
+        chosen = sample_obstacle_cells((rows, cols), (0, 0), (rows - 1, cols - 1), int(round(density * cell_count)),
+                                       rng)
+        obstacle_count = len(chosen)
+        grid = np.zeros(cell_count, dtype=bool)
+        grid[chosen] = True
+        layouts.append(EncodedLayout(rows, cols, obstacle_count, np.packbits(grid).tobytes(),
+                                     start_cell // cols, start_cell % cols, end_cell // cols, end_cell % cols))
+    return layouts
+
+
+def validate_layouts(layouts) -> np.ndarray:
+    """
+    Run the checks of Environment.validate over many encoded layouts at once and return a boolean mask of the
+    valid ones.
+    """
+    if not layouts:
+        return np.zeros(0, dtype=bool)
+    # Every integer column of the layouts, skipping the obstacle bitmap and the moves
+    rows, cols, counts, start_row, start_col, end_row, end_col = np.array(
+        [layout[:3] + layout[4:8] for layout in layouts], dtype=np.int64).T
+    cells = rows * cols
+    valid = (rows > 0) & (cols > 0)
+    valid &= (start_row >= 0) & (start_row < rows) & (start_col >= 0) & (start_col < cols)
+    valid &= (end_row >= 0) & (end_row < rows) & (end_col >= 0) & (end_col < cols)
+    valid &= (start_row != end_row) | (start_col != end_col)
+    valid &= counts < cells - 1
+    valid &= cells - counts - 2 >= rows + cols - 3
+
+    # Start and goal must not be obstacles; read their bits straight from the packed bitmaps
+    start_cells = np.where(valid, start_row * cols + start_col, 0)
+    end_cells = np.where(valid, end_row * cols + end_col, 0)
+    blobs = [layout.obstacles for layout in layouts]
+    start_bytes = np.array([blob[cell >> 3] if cell >> 3 < len(blob) else 0
+                            for blob, cell in zip(blobs, start_cells.tolist())], dtype=np.int64)
+    end_bytes = np.array([blob[cell >> 3] if cell >> 3 < len(blob) else 0
+                          for blob, cell in zip(blobs, end_cells.tolist())], dtype=np.int64)
+    valid &= ((start_bytes >> (7 - (start_cells & 7))) & 1) == 0
+    valid &= ((end_bytes >> (7 - (end_cells & 7))) & 1) == 0
+    return valid
+
+
+def generate_environments(count, sizes=((10, 10),), densities=(0.1,), seed=None, processes=None) -> list:
+    """
+    Generate count layouts, each with a board size drawn from sizes and an obstacle density from densities.
+
+    Every layout gets its own child seed of seed, so the result does not depend on how the work is split over
+    processes. Layouts failing validate_layouts are dropped. Returns a list of EncodedLayout ready for
+    DatabaseManager.store_layouts.
+    """
+    sizes = [tuple(size) for size in sizes]
+    densities = list(densities)
+    seed_sequences = np.random.SeedSequence(seed).spawn(count)
+    if processes is None:
+        processes = (os.cpu_count() or 1) if count >= PARALLEL_THRESHOLD else 1
+
+    if processes > 1:
+        chunk_size = -(-count // processes)
+        chunks = [seed_sequences[i:i + chunk_size] for i in range(0, count, chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_generate_chunk, chunk, sizes, densities) for chunk in chunks]
+            layouts = [layout for future in futures for layout in future.result()]
+    else:
+        layouts = _generate_chunk(seed_sequences, sizes, densities)
+
+    valid = validate_layouts(layouts)
+    return [layout for layout, keep in zip(layouts, valid.tolist()) if keep]
@@ -0,0 +1,159 @@
+"""
+Gymnasium adapters for Environment and VectorEnvironment, for use with standard RL tooling.
+
+gymnasium (1.1 or newer) is an optional dependency; nothing else in the project imports this module, so it is only
+loaded by code that asks for it.
+
+    env = GridWorldEnv(Environment((10, 10), 10, (0, 0), (9, 9)), observation='grid')
+    obs, info = env.reset(seed=0)
+    obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+
+Observations are the state index ('index'), a one-hot vector of the state ('one_hot') or the board as CELL_* codes
+with the agent marked ('grid'). One-hot and grid observations are read-only views of two preallocated buffers used
+in turn and updated in place, two cells per step; an observation stays valid through the following step, so an
+(obs, next_obs) pair can be used before the next step. Pass copy=True to get a fresh array per step instead, which
+gymnasium's env checker requires.
+"""
+try:
+    import gymnasium
+except ImportError as e:
+    raise ImportError("environment.gym_adapter needs gymnasium, install it with 'pip install gymnasium'.") from e
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from environment.cells import CELL_AGENT, CELL_OPEN, CELL_SYMBOLS
+from environment.vector_env import VectorEnvironment
+
+OBSERVATION_TYPES = ('index', 'one_hot', 'grid')
+
+
+def _observation_space(env, observation):
+    if observation not in OBSERVATION_TYPES:
+        raise ValueError(f"Unknown observation type '{observation}', use one of {OBSERVATION_TYPES}.")
+    rows, cols = env.board_size
+    if observation == 'index':
+        return spaces.Discrete(rows * cols)
+    if observation == 'one_hot':
+        return spaces.Box(0, 1, (rows * cols,), dtype=np.uint8)
+    return spaces.Box(0, len(CELL_SYMBOLS) - 1, (rows, cols), dtype=np.uint8)
+
+
+def _background(env, observation):
+    # What the flat observation shows without the agent: nothing for one-hot, the bare board for grid
+    if observation == 'one_hot':
+        return np.zeros(env.board_size[0] * env.board_size[1], dtype=np.uint8)
+    board = env.board_grid()
+    board[env.start[0], env.start[1]] = CELL_OPEN
+    return board.reshape(-1)
+
+
+class _ObservationBuffers:
+    """
+    Two preallocated observation buffers used in turn, so consecutive observations never share memory. Showing
+    a state restores the cells the buffer marked last time from the background and marks the new ones.
+    """
+
+    def __init__(self, observation, background, shape, copy):
+        self._copy = copy
+        self._background = background
+        self._mark = 1 if observation == 'one_hot' else CELL_AGENT
+        self._buffers = [background.copy(), background.copy()]
+        self._views = []
+        for buffer in self._buffers:
+            view = buffer.reshape(shape)
+            view.flags.writeable = False
+            self._views.append(view)
+        self._shown = [None, None]
+        self._turn = 0
+
+    def show(self, key):
+        """key indexes the flat buffer: a state, or (rows, states) for a batch."""
+        self._turn ^= 1
+        buffer, shown = self._buffers[self._turn], self._shown[self._turn]
+        if shown is not None:
+            buffer[shown] = self._background[shown]
+        buffer[key] = self._mark
+        self._shown[self._turn] = key
+        return self._views[self._turn].copy() if self._copy else self._views[self._turn]
+
+
+class GridWorldEnv(gymnasium.Env):
+    """
+    Gymnasium view of one Environment: Discrete actions in the order of env.action_space, rewards from its
+    compiled reward model and truncation after env.max_steps steps.
+    """
+
+    metadata = {'render_modes': []}
+
+    def __init__(self, env, observation='index', copy=False):
+        self.env = env
+        self.observation = observation
+        self.observation_space = _observation_space(env, observation)
+        self.action_space = spaces.Discrete(len(env.action_space))
+        self._buffers = None if observation == 'index' else \
+            _ObservationBuffers(observation, _background(env, observation), self.observation_space.shape, copy)
+
+    def _observe(self, state):
+        return state if self._buffers is None else self._buffers.show(state)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        return self._observe(self.env.reset()), {}
+
+    def step(self, action):
+        state, reward, done = self.env.step_index(int(action))
+        truncated = self.env.truncated
+        return self._observe(state), float(reward), done and not truncated, truncated, {}
+
+
+class GridWorldVectorEnv(VectorEnv):
+    """
+    Gymnasium vector view of a VectorEnvironment, built from a list of environments of one board size and
+    action space. Finished sub-environments reset within the same step: their observation is the start state
+    and infos['final_obs'] holds the observation they finished in, masked by infos['_final_obs'].
+    """
+
+    metadata = {'autoreset_mode': AutoresetMode.SAME_STEP}
+
+    def __init__(self, envs, observation='index', copy=False):
+        self.vector_env = VectorEnvironment(envs)
+        self.observation = observation
+        self.num_envs = self.vector_env.num_envs
+        self.single_observation_space = _observation_space(envs[0], observation)
+        self.single_action_space = spaces.Discrete(len(envs[0].action_space))
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+        self._rows = np.arange(self.num_envs)
+        self._start_states = self.vector_env.reset()
+        self._buffers = self._background = None
+        if observation != 'index':
+            self._background = np.stack([_background(env, observation) for env in envs])
+            self._buffers = _ObservationBuffers(observation, self._background, self.observation_space.shape, copy)
+
+    def _observe(self, states):
+        return states if self._buffers is None else self._buffers.show((self._rows, states))
+
+    def _final_observations(self, states, finished):
+        # Only built on steps where some sub-environment finished
+        if self.observation == 'index':
+            return np.where(finished, states, 0)
+        final = np.zeros_like(self._background)
+        final[finished] = self._background[finished]
+        final[finished, states[finished]] = 1 if self.observation == 'one_hot' else CELL_AGENT
+        return final.reshape(self.observation_space.shape)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        return self._observe(self.vector_env.reset()), {}
+
+    def step(self, actions):
+        states, rewards, terminations = self.vector_env.step(actions)
+        truncations = self.vector_env.truncated
+        finished = terminations | truncations
+        infos = {}
+        if finished.any():
+            infos = {'final_obs': self._final_observations(states, finished), '_final_obs': finished}
+            states = np.where(finished, self._start_states, states)
+        return self._observe(states), rewards.astype(np.float64, copy=False), terminations, truncations, infos
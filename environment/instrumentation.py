@@ -0,0 +1,171 @@
+"""
+Opt-in instrumentation for agent training: per-episode records handed to callbacks, and a sampling profiler
+for the reference training loops. Neither costs more than a None check per step when it is not passed in.
+
+    buffer = RingBuffer(1000)
+    agent.train(env, callbacks=[buffer, JsonlSink("episodes.jsonl")], profiler=SamplingProfiler())
+"""
+import csv
+import json
+import time
+from collections import deque
+from typing import NamedTuple
+
+
+class EpisodeRecord(NamedTuple):
+    episode: int
+    steps: int
+    episode_return: float
+    epsilon: float
+    q_delta: float  # Largest absolute change made to a single Q-value during the episode
+    wall_time: float  # Seconds spent on the episode
+
+
+class TrainingCallback:
+    """
+    Receives the progress of agent.train(). Subclasses override the hooks they need.
+    """
+
+    def on_train_begin(self, agent, env, total_episodes):
+        """Called once before the first episode."""
+
+    def on_episode_end(self, record):
+        """Called after every episode with its EpisodeRecord."""
+
+    def on_train_end(self, agent):
+        """Called once after the last episode."""
+
+
+class RingBuffer(TrainingCallback):
+    """
+    Keeps the last capacity episode records in memory.
+    """
+
+    def __init__(self, capacity=10000):
+        self._records = deque(maxlen=capacity)
+
+    def on_train_begin(self, agent, env, total_episodes):
+        self._records.clear()
+
+    def on_episode_end(self, record):
+        self._records.append(record)
+
+    @property
+    def records(self) -> list:
+        return list(self._records)
+
+
+class JsonlSink(TrainingCallback):
+    """
+    Writes one JSON object per episode to path, replacing the file on every training run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def on_train_begin(self, agent, env, total_episodes):
+        self._file = open(self.path, 'w')
+
+    def on_episode_end(self, record):
+        self._file.write(json.dumps(record._asdict()) + "\n")
+
+    def on_train_end(self, agent):
+        self._file.close()
+        self._file = None
+
+
+class CsvSink(TrainingCallback):
+    """
+    Writes one CSV row per episode to path, with a header of the EpisodeRecord fields.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._writer = None
+
+    def on_train_begin(self, agent, env, total_episodes):
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EpisodeRecord._fields)
+
+    def on_episode_end(self, record):
+        self._writer.writerow(record)
+
+    def on_train_end(self, agent):
+        self._file.close()
+        self._file = self._writer = None
+
+
+class TrainingMonitor:
+    """
+    Turns the per-episode numbers of a training loop into EpisodeRecords and hands them to the callbacks.
+    The agents only build one when callbacks are given.
+    """
+
+    def __init__(self, callbacks):
+        self.callbacks = list(callbacks)
+        self._episode = 0
+        self._last_time = None
+
+    def begin(self, agent, env, total_episodes):
+        self._episode = 0
+        for callback in self.callbacks:
+            callback.on_train_begin(agent, env, total_episodes)
+        self._last_time = time.perf_counter()
+
+    def episode(self, steps, episode_return, q_delta, epsilon):
+        now = time.perf_counter()
+        record = EpisodeRecord(self._episode, steps, episode_return, float(epsilon), q_delta, now - self._last_time)
+        self._episode += 1
+        for callback in self.callbacks:
+            callback.on_episode_end(record)
+        # Callback time is not charged to the next episode
+        self._last_time = time.perf_counter()
+
+    def end(self, agent):
+        for callback in self.callbacks:
+            callback.on_train_end(agent)
+
+
+class SamplingProfiler:
+    """
+    Times every interval-th training step, split into action selection, environment step and Q-value update.
+    Only the reference backend is profiled; the fast kernels fuse the three phases.
+    """
+
+    PHASES = ('select', 'step', 'update')
+
+    def __init__(self, interval=100):
+        self.interval = interval
+        self.samples = 0
+        self.seconds = [0.0, 0.0, 0.0]
+        self._countdown = interval
+
+    def sample(self) -> bool:
+        """Whether the coming step should be timed."""
+        self._countdown -= 1
+        if self._countdown:
+            return False
+        self._countdown = self.interval
+        return True
+
+    def add(self, select, step, update):
+        self.samples += 1
+        self.seconds[0] += select
+        self.seconds[1] += step
+        self.seconds[2] += update
+
+    def summary(self) -> dict:
+        """
+        Mean seconds per sampled step and share of the sampled time for each phase.
+        """
+        total = sum(self.seconds)
+        return {
+            phase: {
+                'mean_seconds': seconds / self.samples if self.samples else 0.0,
+                'share': seconds / total if total else 0.0,
+            }
+            for phase, seconds in zip(self.PHASES, self.seconds)
+        }
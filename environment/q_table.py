@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class ChunkedQTable:
+    """
+    Q-table that allocates its rows in chunks on the first write to a state of the chunk.
+
+    Rows that were never written read as zeros, so an agent that only visits a corridor of a huge board only
+    pays for the chunks along it. Indexed like the dense table the agents use: table[state, :],
+    table[state, action] and table[state, action] += delta.
+    """
+
+    def __init__(self, state_count, action_count, dtype=np.float64, chunk_size=1024):
+        self.shape = (state_count, action_count)
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self._chunks = {}
+        # Shared answer for rows of chunks that do not exist yet; read-only so it cannot be written by accident
+        self._zero_row = np.zeros(action_count, dtype=self.dtype)
+        self._zero_row.flags.writeable = False
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self._chunks.values())
+
+    @property
+    def allocated_states(self):
+        return len(self._chunks) * self.chunk_size
+
+    def _row(self, state, allocate):
+        if not 0 <= state < self.shape[0]:
+            raise IndexError(f"state {state} is out of range for {self.shape[0]} states")
+        chunk_index, offset = divmod(int(state), self.chunk_size)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            if not allocate:
+                return self._zero_row
+            chunk = np.zeros((self.chunk_size, self.shape[1]), dtype=self.dtype)
+            self._chunks[chunk_index] = chunk
+        return chunk[offset]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            state, column = key
+            return self._row(state, False)[column]
+        return self._row(key, False)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, tuple):
+            state, column = key
+            self._row(state, True)[column] = value
+        else:
+            self._row(key, True)[:] = value
+
+    def to_dense(self) -> np.ndarray:
+        dense = np.zeros(self.shape, dtype=self.dtype)
+        for chunk_index, chunk in self._chunks.items():
+            first = chunk_index * self.chunk_size
+            rows = min(self.chunk_size, self.shape[0] - first)
+            dense[first:first + rows] = chunk[:rows]
+        return dense
+
+    def argmax(self, axis=1) -> np.ndarray:
+        """
+        Best action of every state, like argmax(axis=1) of the dense table, without building it: rows of
+        chunks that were never allocated are all zeros and pick action 0.
+        """
+        if axis not in (1, -1):
+            raise ValueError("ChunkedQTable.argmax only supports axis=1.")
+        actions = np.zeros(self.shape[0], dtype=np.int64)
+        for chunk_index, chunk in self._chunks.items():
+            first = chunk_index * self.chunk_size
+            rows = min(self.chunk_size, self.shape[0] - first)
+            actions[first:first + rows] = chunk[:rows].argmax(axis=1)
+        return actions
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+    @classmethod
+    def from_rows(cls, rows, state_count, action_count, dtype=np.float64, chunk_size=1024):
+        """
+        Build a table from a mapping of state to row values, as left behind by the fast training kernels.
+        """
+        table = cls(state_count, action_count, dtype=dtype, chunk_size=chunk_size)
+        for state, row in rows.items():
+            table[state] = row
+        return table
+
+
+def make_q_table(state_count, action_count, dtype=np.float64, sparse=False):
+    """
+    Zeroed Q-table for the agents: a dense array, or a ChunkedQTable when sparse is set.
+    """
+    if sparse:
+        return ChunkedQTable(state_count, action_count, dtype=dtype)
+    return np.zeros((state_count, action_count), dtype=dtype)
@@ -0,0 +1,116 @@
+import sys
+
+from colorama import Fore, Style
+
+from environment.cells import CELL_AGENT, CELL_SYMBOLS, CELL_VISITED
+
+# How each board cell is drawn by AnsiRenderer, five characters wide
+CELL_STYLES = {
+    'H': f"{Fore.GREEN}[ H ]{Style.RESET_ALL}",  # Agent
+    'G': f"{Fore.BLUE}[ G ]{Style.RESET_ALL}",  # Goal
+    'X': f"{Fore.RED}[ X ]{Style.RESET_ALL}",  # Obstacle
+    '*': f"{Fore.BLUE}[ * ]{Style.RESET_ALL}",  # Previously visited
+    'O': f"{Fore.WHITE}[   ]{Style.RESET_ALL}",  # Open space
+}
+# The same styles indexed by cell code
+_CODE_STYLES = [CELL_STYLES[symbol] for symbol in CELL_SYMBOLS]
+
+
+class Renderer:
+    """
+    Receives the frames of Environment.test_run. Subclasses override the hooks they need.
+    """
+
+    def start(self, env):
+        """Called once before the first step."""
+
+    def step(self, step, position, previous_position, action, moved):
+        """Called after every step; moved is False when the move was blocked and the agent stayed put."""
+
+    def finish(self, position, steps, reached_goal):
+        """Called once when the run ends."""
+
+
+class NullRenderer(Renderer):
+    """
+    Draws nothing, for headless runs.
+    """
+
+
+class FrameRecorder(Renderer):
+    """
+    Keeps every frame as (step, position, action, moved) for later inspection or replay.
+    """
+
+    def __init__(self):
+        self.frames = []
+        self.result = None
+
+    def start(self, env):
+        self.frames = [(0, tuple(env.start), None, True)]
+        self.result = None
+
+    def step(self, step, position, previous_position, action, moved):
+        self.frames.append((step, position, action, moved))
+
+    def finish(self, position, steps, reached_goal):
+        self.result = (position, steps, reached_goal)
+
+
+class AnsiRenderer(Renderer):
+    """
+    Colored terminal board. The first frame draws the whole board; later frames move the cursor to the
+    cells that changed and redraw only those, writing one buffered string per frame.
+    """
+
+    # Screen lines above the first board row: step counter, last action, top border
+    HEADER_LINES = 3
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.board = None
+
+    def _write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _cell(self, row, col):
+        # Cursor address of a board cell, 1-based: one column of border, five per cell
+        return f"\033[{self.HEADER_LINES + 1 + row};{2 + 5 * col}H{_CODE_STYLES[self.board[row, col]]}"
+
+    def _status(self, step, position, action, message=""):
+        rows = len(self.board)
+        return (f"\033[1;1H\033[K{Fore.CYAN}Step {step}:{Style.RESET_ALL}"
+                f"\033[2;1H\033[K" + (f"Last Action: {Fore.MAGENTA}{action}{Style.RESET_ALL}" if action else "") +
+                f"\033[{self.HEADER_LINES + rows + 2};1H\033[KAgent is at {Fore.GREEN}{position}{Style.RESET_ALL}"
+                f"\033[{self.HEADER_LINES + rows + 3};1H\033[K{message}")
+
+    def start(self, env):
+        self.board = env.board_grid()
+        border = f"{Fore.YELLOW}+" + ("-" * 5 * self.board.shape[1]) + f"+{Style.RESET_ALL}"
+        lines = ["\033[H\033[J", "\n\n", border, "\n"]
+        for row in self.board.tolist():
+            lines.append("|" + "".join(_CODE_STYLES[cell] for cell in row) + "|\n")
+        lines.append(border)
+        lines.append(self._status(0, tuple(env.start), None, f"Starting test run from {env.start} to {env.end}."))
+        self._write("".join(lines))
+
+    def step(self, step, position, previous_position, action, moved):
+        frame = []
+        if moved and previous_position is not None:
+            self.board[previous_position[0], previous_position[1]] = CELL_VISITED
+            frame.append(self._cell(*previous_position))
+        self.board[position[0], position[1]] = CELL_AGENT
+        frame.append(self._cell(*position))
+        message = "" if moved else (f"{Fore.RED}Step {step}: Hit an obstacle or invalid position. "
+                                    f"Staying at {position}.{Style.RESET_ALL}")
+        frame.append(self._status(step, position, action, message))
+        self._write("".join(frame))
+
+    def finish(self, position, steps, reached_goal):
+        if reached_goal:
+            message = f"{Fore.GREEN}Goal reached at {position} in {steps} steps!{Style.RESET_ALL}"
+        else:
+            message = f"{Fore.RED}Max steps reached without reaching the goal.{Style.RESET_ALL}"
+        rows = len(self.board)
+        self._write(f"\033[{self.HEADER_LINES + rows + 3};1H\033[K{message}\n")
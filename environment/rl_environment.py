@@ -1,44 +1,242 @@
-import random
+import hashlib
 import time
-
-from colorama import Fore, Style
+from collections import deque, namedtuple
+
+import numpy as np
+
+from environment.cells import CELL_AGENT, CELL_GOAL, CELL_OBSTACLE, CELL_SYMBOLS
+
+# (row, col) offset applied by each named action
+ACTION_MOVES = {
+    'up': (-1, 0),
+    'down': (1, 0),
+    'left': (0, -1),
+    'right': (0, 1),
+    'up-left': (-1, -1),
+    'up-right': (-1, 1),
+    'down-left': (1, -1),
+    'down-right': (1, 1),
+    'jump up': (-2, 0),
+    'jump down': (2, 0),
+    'jump left': (0, -2),
+    'jump right': (0, 2),
+}
+_MOVE_NAMES = {move: name for name, move in ACTION_MOVES.items()}
+
+# Ready-made action spaces; every environment starts from 'basic' unless told otherwise
+ACTION_SETS = {
+    'basic': ['up', 'down', 'left', 'right'],
+    'diagonal': ['up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left', 'down-right'],
+    'jump': ['up', 'down', 'left', 'right', 'jump up', 'jump down', 'jump left', 'jump right'],
+    'extended': list(ACTION_MOVES),
+}
+
+# Rewards of an environment that leaves them out of its rewards dict
+DEFAULT_REWARDS = {
+    'goal': 1,  # Moving onto the end point, which ends the episode
+    'obstacle': -1,  # Moving onto an obstacle, which sends the agent back to start
+    'out_of_bounds': -1,  # Trying to leave the board; the agent stays put
+    'step': 0,  # Every other move
+    'cells': None,  # Optional {(row, col): reward} paid instead of the step reward for moving onto those cells
+    'shaping': None,  # Optional potential, 'manhattan' or a (rows, cols) array, see Environment.potential_grid
+    'shaping_gamma': 1.0,  # Discount of the potential of the next state in the shaping term
+}
+
+# Boards with more state-action pairs than this answer step_index from the obstacle grid instead of a
+# precomputed Python list, which would cost around 100 bytes per pair
+STEP_LOOKUP_LIMIT = 1 << 20
+
+# Compiled dynamics of a static board, each array shaped (state_count, action_count); rewards are int8 when
+# every reward is a small integer and float64 otherwise
+Transitions = namedtuple('Transitions', ['next_state', 'reward', 'done'])
+
+
+def compile_action_space(actions) -> tuple:
+    """
+    Turn a list of action names from ACTION_MOVES and/or (drow, dcol) pairs into (names, moves), where moves is
+    a read-only int64 (action_count, 2) array. Moves without a name in ACTION_MOVES are named after their vector.
+    """
+    names, moves = [], []
+    for action in actions:
+        if isinstance(action, str):
+            if action not in ACTION_MOVES:
+                raise ValueError(f"Unknown action {action!r}; expected one of {', '.join(ACTION_MOVES)} "
+                                 f"or a (row, col) move.")
+            move = ACTION_MOVES[action]
+        else:
+            move = tuple(int(offset) for offset in action)
+            if len(move) != 2:
+                raise ValueError(f"A move needs a row and a column offset, got {action!r}.")
+        moves.append(move)
+        names.append(_MOVE_NAMES.get(move, str(move)))
+    if not moves:
+        raise ValueError("The action space needs at least one action.")
+    moves = np.array(moves, dtype=np.int64)
+    moves.flags.writeable = False
+    return names, moves
+
+
+def sample_obstacle_cells(board_size, start, end, count, rng) -> np.ndarray:
+    """
+    Draw count obstacle cells as flat row-major indices, in one pass without replacement.
+
+    A random shortest path from start to end is reserved first, so the goal is always reachable. Fewer cells
+    are returned when the board cannot hold count obstacles besides that path.
+    """
+    rows, cols = board_size
+    ends = [tuple(int(v) for v in point) for point in (start, end)
+            if 0 <= point[0] < rows and 0 <= point[1] < cols]
+    if len(ends) == 2:
+        (start_row, start_col), (end_row, end_col) = ends
+        row_steps, col_steps = abs(end_row - start_row), abs(end_col - start_col)
+        # Shuffle the row and column moves of a shortest path and walk them from the start
+        steps = np.zeros((row_steps + col_steps, 2), dtype=np.int64)
+        steps[:row_steps, 0] = np.sign(end_row - start_row)
+        steps[row_steps:, 1] = np.sign(end_col - start_col)
+        path = np.cumsum(np.vstack([[start_row, start_col], rng.permutation(steps)]), axis=0)
+        reserved = np.unique(path[:, 0] * cols + path[:, 1])
+    else:
+        reserved = np.unique(np.array([row * cols + col for row, col in ends], dtype=np.int64))
+
+    # Draw ranks among the free cells, then shift each rank past the reserved cells before it, so memory
+    # grows with the number of obstacles rather than the board area
+    free_count = rows * cols - reserved.size
+    ranks = rng.choice(free_count, min(max(count, 0), free_count), replace=False)
+    return ranks + np.searchsorted(reserved - np.arange(reserved.size), ranks, side='right')
+
+
+class _LayoutAttribute:
+    """
+    Instance attribute that throws away the compiled transition table whenever it is reassigned.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.name)
+
+    def __set__(self, instance, value):
+        setattr(instance, self.name, value)
+        instance.invalidate_transitions()
+
+
+class _GridStepLookup:
+    """
+    Stand-in for the flat step list of large boards: answers [state * action_count + action_index] with the
+    same (next_state, reward, done) the compiled table would hold, computed from the obstacle and reward grids.
+    """
+
+    def __init__(self, env):
+        self.rows, self.cols = env.board_size
+        self.action_count = len(env.action_space)
+        self.moves = env.moves.tolist()
+        # One byte per cell; indexing bytes is cheaper than indexing the NumPy array
+        self.blocked = env.obstacle_grid().tobytes()
+        self.start_state = env.state_to_index(env.start)
+        self.end_state = env.state_to_index(env.end)
+        # Memoryviews of the flat grids index straight to Python numbers
+        self.cell_reward = memoryview(env.reward_grid().ravel())
+        self.out_of_bounds = env.reward_model()['out_of_bounds']
+        potential = env.potential_grid()
+        self.potential = None if potential is None else memoryview(potential.ravel())
+        self.shaping_gamma = env.reward_model()['shaping_gamma']
+
+    def __getitem__(self, index):
+        state, action_index = divmod(index, self.action_count)
+        row, col = divmod(state, self.cols)
+        row_offset, col_offset = self.moves[action_index]
+        row, col = row + row_offset, col + col_offset
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            next_state, reward, done = state, self.out_of_bounds, False
+        else:
+            target = row * self.cols + col
+            reward = self.cell_reward[target]
+            if self.blocked[target]:
+                next_state, done = self.start_state, False
+            else:
+                next_state, done = target, target == self.end_state
+        if self.potential is not None:
+            # Same operation order as _compile_transitions, so both give identical floats
+            reward = reward + (0.0 if done else self.shaping_gamma * self.potential[next_state]) \
+                - self.potential[state]
+        return next_state, reward, done
 
 
 class Environment:
+    # Reassigning any of these, or action_space, rebuilds the transition table on the next lookup. Mutating
+    # the obstacles set in place is not detected, call invalidate_transitions() afterwards.
+    board_size = _LayoutAttribute()
+    obstacles = _LayoutAttribute()
+    start = _LayoutAttribute()
+    end = _LayoutAttribute()
+    rewards = _LayoutAttribute()
+
     def __init__(self, board_size: tuple, obstacle_count: int, start: tuple, end: tuple, obstacles=None,
                  rewards=None, action_space=None, termination_conditions=None):
-        self.current_position = None
+        self._transitions = None
+        self._step_lookup = None
+        self._grid = None
+        self._reward_grid = None
+        self._potential = None
+        self.current_state = None
+        self.episode_steps = 0
         self.board_size = board_size
         self.obstacle_count = obstacle_count
         self.start = start
         self.end = end
         self.obstacles = obstacles if obstacles is not None else self.generate_obstacles()
         self.rewards = rewards
-        self.action_space = action_space if action_space is not None else ['up', 'down', 'left', 'right']
+        self.action_space = action_space if action_space is not None else ACTION_SETS['basic']
         self.termination_conditions = termination_conditions if termination_conditions is not None \
             else self.default_termination_conditions()
-
-    def generate_obstacles(self) -> set:
-        print(self.start, self.end)
-        """Randomly generate obstacles on the board."""
-        obstacles = set()
-        while len(obstacles) < self.obstacle_count:
-            x = random.randint(0, self.board_size[0] - 1)
-            y = random.randint(0, self.board_size[1] - 1)
-            while (x, y) == self.start or (x, y) == self.end:
-                x = random.randint(0, self.board_size[0] - 1)
-                y = random.randint(0, self.board_size[1] - 1)
-            obstacles.add((x, y))
-        return obstacles
+        self._step_budget = self.max_steps
+
+    @property
+    def action_space(self) -> list:
+        """Names of the actions, in the order of the action indices."""
+        return self._action_space
+
+    @action_space.setter
+    def action_space(self, actions):
+        # Compiled once here so stepping is an index into moves plus an add, whatever the action names are
+        self._action_space, self.moves = compile_action_space(actions)
+        self._move_list = self.moves.tolist()
+        self._action_index = {name: index for index, name in enumerate(self._action_space)}
+        self.invalidate_transitions()
+
+    def generate_obstacles(self, rng=None) -> set:
+        """Randomly generate obstacles on the board, always leaving a path from start to end."""
+        rng = rng if rng is not None else np.random.default_rng()
+        cols = self.board_size[1]
+        cells = sample_obstacle_cells(self.board_size, self.start, self.end, self.obstacle_count, rng)
+        return set(zip((cells // cols).tolist(), (cells % cols).tolist()))
 
     @staticmethod
     def default_termination_conditions() -> dict:
         """Define default termination conditions."""
         return {
             'goal_reached': False,
-            'max_steps': 100  # Max steps before termination
+            'max_steps': None  # Max steps before termination, None allows one step per cell of the board
         }
 
+    @property
+    def max_steps(self) -> int:
+        """
+        Step budget of an episode: step_index() and step() report done once an episode has taken this many
+        steps, and truncated tells that apart from reaching the goal. Changes to the termination conditions or
+        the board size apply from the next reset().
+        """
+        limit = (self.termination_conditions or {}).get('max_steps')
+        return limit if limit is not None else self.board_size[0] * self.board_size[1]
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the current episode used up max_steps without reaching the goal."""
+        return self.episode_steps >= self._step_budget and self.current_state != self.state_to_index(self.end)
+
     def validate(self):
         """Validate parameters for consistency."""
 
@@ -94,8 +292,173 @@ class Environment:
         except ValueError as e:
             return f"ERROR! {e}", "end"
 
+        # Check that the rewards only set known entries
+        try:
+            self.reward_model()
+        except ValueError as e:
+            return f"ERROR! {e}", "rewards"
+
+        # Check that the obstacles leave a way from start to end
+        try:
+            if not self.is_solvable():
+                raise ValueError("The obstacles block every path from the start to the end point.")
+        except ValueError as e:
+            return f"ERROR! {e}", "obstacle_count"
+
         return None, None  # No errors
 
+    def obstacle_grid(self) -> np.ndarray:
+        """
+        Read-only boolean (rows, cols) array marking the obstacle cells; obstacles outside the board are ignored.
+        Built once and reused until the layout changes, one byte per cell.
+        """
+        if self._grid is None:
+            rows, cols = self.board_size
+            grid = np.zeros((rows, cols), dtype=bool)
+            if self.obstacles:
+                cells = np.array(list(self.obstacles), dtype=np.int64).reshape(-1, 2)
+                inside = (cells[:, 0] >= 0) & (cells[:, 0] < rows) & (cells[:, 1] >= 0) & (cells[:, 1] < cols)
+                grid[cells[inside, 0], cells[inside, 1]] = True
+            grid.flags.writeable = False
+            self._grid = grid
+        return self._grid
+
+    def board_grid(self) -> np.ndarray:
+        """
+        The board as a uint8 (rows, cols) array of CELL_* codes with the agent on the start cell.
+        The compact counterpart of initialize_board, used by the renderers.
+        """
+        board = self.obstacle_grid().astype(np.uint8) * CELL_OBSTACLE
+        if board[self.start[0], self.start[1]] == CELL_OBSTACLE:
+            raise ValueError(f"Start position {self.start} overlaps with an obstacle.")
+        board[self.start[0], self.start[1]] = CELL_AGENT
+        if board[self.end[0], self.end[1]] == CELL_OBSTACLE:
+            raise ValueError(f"Goal position {self.end} overlaps with an obstacle.")
+        board[self.end[0], self.end[1]] = CELL_GOAL
+        return board
+
+    def reward_model(self) -> dict:
+        """The rewards dict, completed with DEFAULT_REWARDS. Keys DEFAULT_REWARDS does not have raise ValueError."""
+        unknown = [key for key in (self.rewards or {}) if key not in DEFAULT_REWARDS]
+        if unknown:
+            raise ValueError(f"Unknown reward {', '.join(map(repr, unknown))}; expected some of "
+                             f"{', '.join(DEFAULT_REWARDS)}.")
+        return {**DEFAULT_REWARDS, **(self.rewards or {})}
+
+    def reward_grid(self) -> np.ndarray:
+        """
+        Read-only (rows, cols) array of the reward for moving onto each cell: the goal and obstacle rewards on
+        those cells, the 'cells' rewards and the step reward everywhere else. int8 when every reward is a
+        small integer, float64 otherwise. Built once and reused until the layout or the rewards change.
+        """
+        if self._reward_grid is None:
+            model = self.reward_model()
+            cells = model['cells'] or {}
+            values = [model['goal'], model['obstacle'], model['out_of_bounds'], model['step'], *cells.values()]
+            small = all(float(value).is_integer() and -128 <= value <= 127 for value in values)
+            grid = np.full(self.board_size, model['step'], dtype=np.int8 if small else np.float64)
+            for (row, col), reward in cells.items():
+                if self._is_in_bounds((row, col)):
+                    grid[row, col] = reward
+            grid[self.obstacle_grid()] = model['obstacle']
+            if self._is_in_bounds(self.end):
+                grid[self.end[0], self.end[1]] = model['goal']
+            grid.flags.writeable = False
+            self._reward_grid = grid
+        return self._reward_grid
+
+    def potential_grid(self):
+        """
+        Read-only float64 (rows, cols) shaping potential, or None when the rewards have no 'shaping'.
+
+        Moving from s to s' earns shaping_gamma * potential[s'] - potential[s] on top of the reward, with the
+        potential of the goal counted as zero. 'manhattan' uses minus the Manhattan distance to the end point,
+        so with the default shaping_gamma of 1 every move towards the goal pays 1 and every move away costs 1.
+        Setting shaping_gamma to the agent's gamma guarantees the optimal policy is unchanged, at the price of
+        a weaker signal far from the goal.
+        """
+        shaping = self.reward_model()['shaping']
+        if shaping is None:
+            return None
+        if self._potential is None:
+            rows, cols = self.board_size
+            if isinstance(shaping, str):
+                if shaping != 'manhattan':
+                    raise ValueError(f"Unknown shaping '{shaping}', use 'manhattan' or a (rows, cols) array.")
+                row_index, col_index = np.indices((rows, cols))
+                potential = -(np.abs(row_index - self.end[0]) + np.abs(col_index - self.end[1])).astype(np.float64)
+            else:
+                potential = np.array(shaping, dtype=np.float64)
+                if potential.shape != (rows, cols):
+                    raise ValueError(f"The shaping potential must have the board shape {(rows, cols)}, "
+                                     f"got {potential.shape}.")
+            potential.flags.writeable = False
+            self._potential = potential
+        return self._potential
+
+    def shortest_path_length(self):
+        """
+        Fewest steps from start to end avoiding obstacles, or None when the end cannot be reached.
+
+        Breadth-first search over a flat, padded copy of the board: each cell is queued at most once, so the
+        cost is linear in the number of cells however long the path is.
+        """
+        rows, cols = self.board_size
+        if not (self._is_in_bounds(self.start) and self._is_in_bounds(self.end)):
+            return None
+        obstacles = self.obstacle_grid()
+        if obstacles[self.start[0], self.start[1]] or obstacles[self.end[0], self.end[1]]:
+            return None
+        if tuple(self.start) == tuple(self.end):
+            return 0
+        # Moves longer than the board always leave it; the rest fit in a blocked border of the longest offset
+        moves = [(d_row, d_col) for d_row, d_col in self._move_list if abs(d_row) < rows and abs(d_col) < cols]
+        pad = max((max(abs(d_row), abs(d_col)) for d_row, d_col in moves), default=0)
+        width = cols + 2 * pad
+        blocked = bytearray(np.pad(obstacles, pad, constant_values=True).astype(np.uint8).tobytes())
+        offsets = [d_row * width + d_col for d_row, d_col in moves]
+
+        start = (self.start[0] + pad) * width + self.start[1] + pad
+        end = (self.end[0] + pad) * width + self.end[1] + pad
+        blocked[start] = 1
+        queue = deque([start])
+        distance = 0
+        while queue:
+            distance += 1
+            for _ in range(len(queue)):
+                cell = queue.popleft()
+                for offset in offsets:
+                    target = cell + offset
+                    if not blocked[target]:
+                        if target == end:
+                            return distance
+                        blocked[target] = 1
+                        queue.append(target)
+        return None
+
+    def is_solvable(self) -> bool:
+        """
+        Whether the end point can be reached from the start without crossing an obstacle.
+        """
+        return self.shortest_path_length() is not None
+
+    def fingerprint(self):
+        """
+        Stable hash of everything that shapes the dynamics, used to tell whether a stored Q-table still applies.
+        """
+        def cell(position):
+            return tuple(int(value) for value in position)
+
+        layout = (cell(self.board_size), cell(self.start), cell(self.end), sorted(map(cell, self.obstacles)),
+                  list(self.action_space))
+        model = self.reward_model()
+        potential = self.potential_grid()
+        if potential is not None or any(model[key] != DEFAULT_REWARDS.get(key) for key in model if key != 'shaping'):
+            # Only non-default rewards extend the hash, so tables stored before they existed still match
+            layout += (self.reward_grid().tobytes(), model['out_of_bounds'],
+                       None if potential is None else potential.tobytes(), model['shaping_gamma'])
+        return hashlib.sha1(repr(layout).encode('utf-8')).hexdigest()
+
     def __str__(self):
         print()
         return (f"The Created Environment Has:\n"
@@ -104,198 +467,187 @@ class Environment:
                 f"start={self.start},\n"
                 f"end={self.end},\n")
 
-    def test_run(self, agent, delay=0.5):
+    def test_run(self, agent, delay=0.5, renderer=None):
         """
-        Simulate a test run on the board with real-time movement visualization.
+        Simulate a test run on the board, showing each step through the renderer (AnsiRenderer by default).
+        Returns the number of steps to the goal, or None if the step budget ran out.
         """
-        board = self.initialize_board()  # Initialize the static board
-        print(board)
-        current_position = self.start
+        if renderer is None:
+            from environment.render import AnsiRenderer  # colorama is only needed to draw
+            renderer = AnsiRenderer()
+        current_position = tuple(self.start)
         previous_position = None
-        steps = 0
         state = self.state_to_index(current_position)  # Get initial state index
+        max_steps = self.max_steps
+        renderer.start(self)
 
-        print(f"Starting test run from {self.start} to {self.end}.\n")
-
-        while steps < (self.board_size[0] * self.board_size[1]):
-            # Update board visualization dynamically
-            if steps > 0:  # Clear previous agent position unless it's the first step
-                board[current_position[0]][current_position[1]] = 'O'
-
+        for steps in range(1, max_steps + 1):
             # Agent selects an action based on current state
-            action_index = agent.select_action(state)  # Select action from Q-table
-            action = self.action_space[action_index]  # Map action index to action string
-
-            # Calculate the next position
-            next_position = self.take_action(current_position, action)
-
-            self.display_board(board, steps, current_position, previous_position, last_action=action)
-
-            # Print the action and movement for debugging
-            print(f"Step {steps}: Action to do: {action}")
-            print(f"Step {steps + 1}: Current Position: {current_position}, Next Position: {next_position}")
-
-            # Check if the move is valid
-            if self.is_valid_position(next_position, board):
-                previous_position = current_position
-                current_position = next_position  # Update position
-                state = self.state_to_index(current_position)  # Update state index
-                board[current_position[0]][current_position[1]] = 'H'  # Mark the new agent position
-            else:
-                print(
-                    f"{Fore.RED}Step {steps + 1}: Hit an obstacle or invalid position at {next_position}. "
-                    f"Staying at {current_position}.{Style.RESET_ALL}"
-                )
+            action_index = agent.select_action(state)
+            action = self.action_space[action_index]  # Action name for the renderer
+            next_position = self.take_action(current_position, action_index)
 
-            self.display_board(board, steps + 1, current_position, previous_position, last_action=action)
+            # Blocked moves leave the agent where it is
+            moved = self._is_in_bounds(next_position) and next_position not in self.obstacles
+            if moved:
+                previous_position, current_position = current_position, next_position
+                state = self.state_to_index(current_position)
+            renderer.step(steps, current_position, previous_position, action, moved)
 
             # Check if the agent reached the goal
             if current_position == self.end:
-                board[current_position[0]][current_position[1]] = 'H'  # Final position
-                self.display_board(board, steps + 1, current_position, previous_position, last_action=action)
-                print(f"{Fore.GREEN}Goal reached at {current_position} in {steps + 1} steps!{Style.RESET_ALL}")
-                return steps + 1
+                renderer.finish(current_position, steps, True)
+                return steps
 
-            steps += 1
-            time.sleep(delay)
+            if delay:
+                time.sleep(delay)
 
         # Max steps reached without reaching the goal
-        self.display_board(board, steps, current_position, previous_position, last_action=action)
-        print(f"{Fore.RED}Max steps reached without reaching the goal.{Style.RESET_ALL}")
+        renderer.finish(current_position, max_steps, False)
         return None
 
+    def evaluate(self, agent, episodes=1, max_steps=None):
+        """
+        Run the agent's greedy policy headless at full speed and return step/success statistics.
+        Steps follow the same dynamics as step(), so hitting an obstacle sends the agent back to start.
+        max_steps can shorten an episode but not extend it past the environment's own max_steps.
+        """
+        if max_steps is None:
+            max_steps = self.max_steps
+        steps_to_goal = []
+        for _ in range(episodes):
+            state = self.reset()
+            for step in range(max_steps):
+                state, reward, done = self.step_index(agent.select_action(state))
+                if done:
+                    if not self.truncated:
+                        steps_to_goal.append(step + 1)
+                    break
+        return {
+            'episodes': episodes,
+            'successes': len(steps_to_goal),
+            'success_rate': len(steps_to_goal) / episodes if episodes else 0.0,
+            'mean_steps': sum(steps_to_goal) / len(steps_to_goal) if steps_to_goal else None,
+            'min_steps': min(steps_to_goal, default=None),
+            'max_steps': max(steps_to_goal, default=None),
+        }
+
     def initialize_board(self):
         """
         Create a 2D board with obstacles and open spaces.
         """
-        board = [['O' for _ in range(self.board_size[1])] for _ in range(self.board_size[0])]
-
-        # Place obstacles
         for obstacle in self.obstacles:
-            if 0 <= obstacle[0] < self.board_size[0] and 0 <= obstacle[1] < self.board_size[1]:
-                board[obstacle[0]][obstacle[1]] = 'X'
-            else:
+            if not self._is_in_bounds(obstacle):
                 print(f"Warning: Obstacle at {obstacle} is out of bounds and will be ignored.")
+        return [[CELL_SYMBOLS[cell] for cell in row] for row in self.board_grid().tolist()]
 
-        # Place start position
-        if board[self.start[0]][self.start[1]] == 'X':
-            raise ValueError(f"Start position {self.start} overlaps with an obstacle.")
-        board[self.start[0]][self.start[1]] = 'H'
-
-        # Place goal position
-        if board[self.end[0]][self.end[1]] == 'X':
-            raise ValueError(f"Goal position {self.end} overlaps with an obstacle.")
-        board[self.end[0]][self.end[1]] = 'G'
+    def take_action(self, position, action):
+        """
+        Position one move away from position, ignoring bounds and obstacles. action is an index into
+        action_space or an action name.
+        """
+        row_offset, col_offset = self._move_list[self._action_index.get(action, action)]
+        return position[0] + row_offset, position[1] + col_offset
 
-        return board
+    @property
+    def current_position(self):
+        if self.current_state is None:
+            return None
+        return divmod(self.current_state, self.board_size[1])
 
-    @staticmethod
-    def display_board(board, step, agent_position, previous_position=None, visited_positions=None, last_action=None):
-        """
-        Display the board dynamically with visualization for every step.
-        """
-        if visited_positions is None:
-            visited_positions = set()
-        # Clear terminal
-        print("\033[H\033[J", end="")
-
-        print(f"{Fore.CYAN}Step {step}:{Style.RESET_ALL}")
-        if last_action:
-            print(f"Last Action: {Fore.MAGENTA}{last_action}{Style.RESET_ALL}")
-
-        # Mark the previous position as visited
-        if previous_position and previous_position != agent_position:
-            visited_positions.add(previous_position)
-
-        # Update the board
-        for pos in visited_positions:
-            board[pos[0]][pos[1]] = '*'
-
-        # Mark the agent's current position
-        board[agent_position[0]][agent_position[1]] = 'H'
-
-        # Display the updated board
-        print(f"{Fore.YELLOW}+" + ("-" * 5 * len(board[0])) + f"+{Style.RESET_ALL}")
-        for row in board:
-            row_display = "|"
-            for cell in row:
-                if cell == 'H':  # Agent
-                    row_display += f"{Fore.GREEN}[ H ]{Style.RESET_ALL}"
-                elif cell == 'G':  # Goal
-                    row_display += f"{Fore.BLUE}[ G ]{Style.RESET_ALL}"
-                elif cell == 'X':  # Obstacle
-                    row_display += f"{Fore.RED}[ X ]{Style.RESET_ALL}"
-                elif cell == '*':  # Previously visited
-                    row_display += f"{Fore.BLUE}[ * ]{Style.RESET_ALL}"
-                else:  # Open space
-                    row_display += f"{Fore.WHITE}[   ]{Style.RESET_ALL}"
-            row_display += "|"
-            print(row_display)
-
-        # Bottom border
-        print(f"{Fore.YELLOW}+" + ("-" * 5 * len(board[0])) + f"+{Style.RESET_ALL}")
-
-        print(f"Agent is at {Fore.GREEN}{agent_position}{Style.RESET_ALL}\n")
+    @current_position.setter
+    def current_position(self, position):
+        self.current_state = None if position is None else self.state_to_index(position)
 
-    @staticmethod
-    def is_valid_position(position, board):
+    def invalidate_transitions(self):
         """
-        Check if the position is within bounds and not an obstacle.
+        Drop the compiled transition table so it is rebuilt from the current layout on the next lookup.
         """
-        rows = len(board)
-        cols = len(board[0])
-        if 0 <= position[0] < rows and 0 <= position[1] < cols:
-            return board[position[0]][position[1]] != 'X'
-        return False
+        self._transitions = None
+        self._step_lookup = None
+        self._grid = None
+        self._reward_grid = None
+        self._potential = None
 
-    @staticmethod
-    def take_action(position, action):
-        if action == 'up':
-            return position[0] - 1, position[1]
-        elif action == 'down':
-            return position[0] + 1, position[1]
-        elif action == 'left':
-            return position[0], position[1] - 1
-        elif action == 'right':
-            return position[0], position[1] + 1
-        # elif action == 'jump':
-        #     return position[0], position[1] + 2
-        # elif action == 'diagonal':
-        #     return position[0] + 1, position[1] + 1
-        return position  # Return the same position if action is invalid
+    def transition_table(self) -> Transitions:
+        """
+        Compile the board into next_state, reward and done arrays indexed by [state, action_index].
+        The table is built once and reused until the layout changes.
+        """
+        if self._transitions is None:
+            self._transitions = self._compile_transitions()
+        return self._transitions
+
+    def _compile_transitions(self) -> Transitions:
+        rows, cols = self.board_size
+        state_count = rows * cols
+        moves = self.moves
+
+        blocked = self.obstacle_grid()
+
+        states = np.arange(state_count, dtype=np.int64)
+        target_row = (states // cols)[:, None] + moves[:, 0]
+        target_col = (states % cols)[:, None] + moves[:, 1]
+        in_bounds = (target_row >= 0) & (target_row < rows) & (target_col >= 0) & (target_col < cols)
+        # Clamp so out-of-bounds targets can still index the obstacle grid, in_bounds masks them out
+        hit = in_bounds & blocked[np.clip(target_row, 0, rows - 1), np.clip(target_col, 0, cols - 1)]
+        done = in_bounds & ~hit & (target_row == self.end[0]) & (target_col == self.end[1])
+
+        next_state = np.where(in_bounds, target_row * cols + target_col, states[:, None])
+        next_state = np.where(hit, self.state_to_index(self.start), next_state)
+
+        # Reward of the cell moved onto, obstacles and goal included; shaping is folded in here once so a
+        # step costs the same with or without it
+        model = self.reward_model()
+        cell_reward = self.reward_grid()
+        reward = np.where(in_bounds, cell_reward[np.clip(target_row, 0, rows - 1), np.clip(target_col, 0, cols - 1)],
+                          model['out_of_bounds']).astype(cell_reward.dtype)
+        potential = self.potential_grid()
+        if potential is not None:
+            potential = potential.ravel()
+            reward = reward + np.where(done, 0.0, model['shaping_gamma'] * potential[next_state]) \
+                - potential[states][:, None]
+        # Half the memory of int64 on every board that fits in a database row
+        if state_count <= np.iinfo(np.int32).max:
+            next_state = next_state.astype(np.int32)
+        return Transitions(next_state, reward, done)
 
     def reset(self):
         """
         Reset the environment to the initial state.
         """
         self.current_position = self.start
-        return self.state_to_index(self.current_position)  # Return the initial state as index
+        self.episode_steps = 0
+        self._step_budget = self.max_steps
+        return self.current_state  # Return the initial state as index
 
-    def step(self, action):
+    def step_index(self, action_index):
         """
-        Take an action in the environment and return (next_state, reward, done).
+        Take an action given by its index in action_space and return (next_state, reward, done).
+        Same semantics as step(), answered from the compiled transition table. done is also set on the step
+        that uses up max_steps, with truncated set unless that step reached the goal.
         """
-        next_position = self.take_action(self.current_position, action)
-
-        # Check if the next position is out of bounds
-        if not self._is_in_bounds(next_position):
-            return self.state_to_index(self.current_position), -1, False  # Penalty for invalid move
-
-        # Check if the next position is an obstacle
-        if next_position in self.obstacles:
-            self.current_position = self.start  # Reset position to the start
-            return self.state_to_index(self.current_position), -1, False  # Penalty and restart
-
-        # Check if the goal is reached
-        if next_position == self.end:
-            self.current_position = next_position  # Update position
-            return self.state_to_index(next_position), 1, True  # Reward for reaching goal
-
-        # Normal move
-        self.current_position = next_position
-        return self.state_to_index(next_position), 0, False  # No reward for normal moves
+        if self._step_lookup is None:
+            if self.board_size[0] * self.board_size[1] * len(self.action_space) > STEP_LOOKUP_LIMIT:
+                self._step_lookup = _GridStepLookup(self)
+            else:
+                # Flat Python list of (next_state, reward, done) keeps the per-step cost to one list lookup
+                table = self.transition_table()
+                self._step_lookup = list(zip(table.next_state.ravel().tolist(), table.reward.ravel().tolist(),
+                                             table.done.ravel().tolist()))
+        result = self._step_lookup[self.current_state * len(self.action_space) + action_index]
+        self.current_state = result[0]
+        self.episode_steps += 1
+        if self.episode_steps >= self._step_budget and not result[2]:
+            return result[0], result[1], True
+        return result
 
-    # Normal transition
+    def step(self, action):
+        """
+        Take an action, given by its name or its index in action_space, and return (next_state, reward, done).
+        done is set when the goal is reached or the episode has used up max_steps; see truncated.
+        """
+        return self.step_index(self._action_index.get(action, action))
 
     def state_to_index(self, position):
         """
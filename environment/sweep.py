@@ -0,0 +1,152 @@
+"""
+Hyperparameter and multi-seed sweeps over a process pool.
+
+Example:
+    python -m environment.sweep --env-id 12 --algo sarsa --grid lr=0.1,0.2,0.3 gamma=0.9,0.99 --seeds 8
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from environment.agent import AGENTS as ALGORITHMS
+from environment.rl_environment import Environment
+
+# Short names accepted on the command line for agent constructor arguments
+PARAM_ALIASES = {
+    'lr': 'learning_rate',
+    'decay': 'decay_rate',
+    'lambda': 'trace_decay',
+}
+
+# Environment of the current worker process, set once by _init_worker instead of being pickled per task
+_worker_env = None
+
+
+def _worker_layout(env):
+    # Everything _init_worker needs to rebuild env in a worker: layout, reward model and termination conditions
+    return (tuple(env.board_size), set(env.obstacles), tuple(env.start), tuple(env.end), env.moves.tolist(),
+            env.rewards, env.termination_conditions)
+
+
+def _init_worker(board_size, obstacles, start, end, moves, rewards, termination_conditions):
+    global _worker_env
+    _worker_env = Environment(board_size=board_size, obstacle_count=len(obstacles), start=start, end=end,
+                              obstacles=obstacles, rewards=rewards, action_space=moves,
+                              termination_conditions=termination_conditions)
+
+
+def _run_one(task):
+    algorithm, params, seed, total_episodes, backend = task
+    env = _worker_env
+    agent = ALGORITHMS[algorithm](env.board_size[0] * env.board_size[1], len(env.action_space), **params)
+    started = time.perf_counter()
+    agent.train(env, total_episodes=total_episodes, seed=seed, backend=backend)
+    wall_time = time.perf_counter() - started
+    return algorithm, params, seed, env.evaluate(agent)['min_steps'], wall_time
+
+
+def _parse_value(value):
+    # Integer literals stay int (planning_steps, queue_size), true/false become bool, words such as a trace type
+    # stay strings
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return {'true': True, 'false': False}.get(value.lower(), value)
+
+
+def parse_grid(items):
+    """
+    Turn ["lr=0.1,0.2", "planning_steps=5"] into {'learning_rate': [0.1, 0.2], 'planning_steps': [5]}.
+    """
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if not values:
+            raise ValueError(f"Grid entry '{item}' must look like name=value1,value2")
+        grid[PARAM_ALIASES.get(name, name)] = [_parse_value(value) for value in values.split(',')]
+    return grid
+
+
+def run_sweep(env, algorithm, grid, seeds, total_episodes=None, workers=None, backend='fast'):
+    """
+    Train every combination of grid values for each seed on a process pool.
+
+    Returns (runs, summary): runs holds one (algorithm, params, seed, steps_to_goal, wall_time) tuple per
+    training run, summary one dict per configuration with its success rate, mean steps and mean wall time.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm '{algorithm}', use one of {sorted(ALGORITHMS)}.")
+    seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+    names = list(grid)
+    configurations = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    tasks = [(algorithm, params, seed, total_episodes, backend) for params in configurations for seed in seeds]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=_worker_layout(env)) as executor:
+        runs = list(executor.map(_run_one, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    summary = []
+    for params in configurations:
+        matching = [run for run in runs if run[1] == params]
+        steps = [run[3] for run in matching if run[3] is not None]
+        summary.append({
+            'params': params,
+            'success_rate': len(steps) / len(matching),
+            'mean_steps': sum(steps) / len(steps) if steps else None,
+            'mean_wall_time': sum(run[4] for run in matching) / len(matching),
+        })
+    return runs, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the tabular agents.")
+    parser.add_argument('--env-id', type=int, required=True, help="id of the environment in the database")
+    parser.add_argument('--algo', choices=sorted(ALGORITHMS), default='q_learning')
+    parser.add_argument('--grid', nargs='*', default=[],
+                        help="name=v1,v2 ... with any constructor argument of the agent, e.g. lr, gamma, decay; "
+                             "lambda, trace_type and trace_cutoff for q_lambda and sarsa_lambda; planning_steps, "
+                             "prioritized, priority_threshold and queue_size for dyna_q")
+    parser.add_argument('--seeds', type=int, default=1, help="number of seeds per configuration")
+    parser.add_argument('--episodes', type=int, default=None, help="training episodes per run")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--backend', choices=('reference', 'fast'), default='fast')
+    parser.add_argument('--db', default='environment_data.db')
+    parser.add_argument('--username', default='sweep', help="player_username recorded with the results")
+    args = parser.parse_args(argv)
+
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager(args.db)
+    try:
+        env = db_manager.load_environment(args.env_id)
+        if env is None:
+            parser.error(f"No environment with id {args.env_id}.")
+
+        started = time.perf_counter()
+        runs, summary = run_sweep(env, args.algo, parse_grid(args.grid), args.seeds, args.episodes,
+                                  args.workers, args.backend)
+        elapsed = time.perf_counter() - started
+
+        db_manager.store_results([
+            (args.env_id, steps, 1 if steps is not None else 0, args.username, algorithm,
+             json.dumps(params, sort_keys=True), wall_time)
+            for algorithm, params, seed, steps, wall_time in runs
+        ])
+    finally:
+        db_manager.close()
+
+    for row in summary:
+        mean_steps = f"{row['mean_steps']:.1f}" if row['mean_steps'] is not None else "-"
+        print(f"{json.dumps(row['params'], sort_keys=True)}: success {row['success_rate']:.0%}, "
+              f"steps {mean_steps}, wall time {row['mean_wall_time']:.2f}s")
+    print(f"{len(runs)} runs in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class VectorEnvironment:
+    """
+    Step N grid worlds of one board size at once.
+
+    Every sub-environment follows the same rules as Environment.step: an out-of-bounds move leaves the agent
+    where it is, hitting an obstacle sends it back to start and reaching the goal ends the episode, each paid
+    according to the environment's reward model, shaping included. Sub-environments that reach the goal or
+    use up their max_steps are reset automatically.
+    """
+
+    def __init__(self, envs):
+        if not envs:
+            raise ValueError("VectorEnvironment needs at least one environment.")
+        board_size = tuple(envs[0].board_size)
+        moves = envs[0].moves
+        for env in envs:
+            if tuple(env.board_size) != board_size:
+                raise ValueError(f"All environments must share one board size, got {env.board_size} "
+                                 f"and {board_size}.")
+            if not np.array_equal(env.moves, moves):
+                raise ValueError("All environments must share one action space.")
+
+        self.envs = list(envs)
+        self.num_envs = len(envs)
+        self.board_size = board_size
+        self.action_space = list(envs[0].action_space)
+        self._moves = moves
+        self._obstacles = np.stack([env.obstacle_grid() for env in envs])
+        self._cell_rewards = np.stack([env.reward_grid() for env in envs])
+        self._out_of_bounds = np.array([env.reward_model()['out_of_bounds'] for env in envs])
+        potentials = [env.potential_grid() for env in envs]
+        if all(potential is None for potential in potentials):
+            self._potentials = None
+        else:
+            # A zero potential with a discount of one adds nothing for sub-environments without shaping
+            self._potentials = np.stack([np.zeros(board_size) if potential is None else potential
+                                         for potential in potentials])
+            self._shaping_gamma = np.array([env.reward_model()['shaping_gamma'] if potential is not None else 1.0
+                                            for env, potential in zip(envs, potentials)])
+        self._max_steps = np.array([env.max_steps for env in envs], dtype=np.int64)
+        self._start = np.array([env.start for env in envs], dtype=np.int64)
+        self._end = np.array([env.end for env in envs], dtype=np.int64)
+        self._rows = np.arange(self.num_envs)
+        self.positions = self._start.copy()
+        self.episode_steps = np.zeros(self.num_envs, dtype=np.int64)
+        # Sub-environments whose last step ran out of max_steps without reaching the goal
+        self.truncated = np.zeros(self.num_envs, dtype=bool)
+
+    @classmethod
+    def from_environment(cls, env, num_envs):
+        """
+        Build a batch of num_envs copies of a single environment layout.
+        """
+        return cls([env] * num_envs)
+
+    def _to_states(self, positions):
+        return positions[:, 0] * self.board_size[1] + positions[:, 1]
+
+    def reset(self):
+        """
+        Reset every sub-environment and return the batch of initial state indices.
+        """
+        self.positions = self._start.copy()
+        self.episode_steps[:] = 0
+        self.truncated[:] = False
+        return self._to_states(self.positions)
+
+    def step(self, actions):
+        """
+        Take one action per sub-environment and return (next_states, rewards, dones) arrays.
+
+        For sub-environments that reached the goal or were truncated (see the truncated attribute),
+        next_states holds the state they ended in so the caller can bootstrap from it; their position is
+        already reset to start for the following step.
+
+        Unlike Environment.step, which also reports done on the step that uses up max_steps, dones only marks
+        the goal; a sub-environment that ran out of steps shows up in truncated alone.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        target = self.positions + self._moves[actions]
+
+        in_bounds = ((target[:, 0] >= 0) & (target[:, 0] < self.board_size[0]) &
+                     (target[:, 1] >= 0) & (target[:, 1] < self.board_size[1]))
+        # Out-of-bounds moves stay put; clamping keeps the obstacle lookup in range
+        target = np.where(in_bounds[:, None], target, self.positions)
+        hit = in_bounds & self._obstacles[self._rows, target[:, 0], target[:, 1]]
+        goal = in_bounds & ~hit & (target == self._end).all(axis=1)
+
+        next_positions = np.where(hit[:, None], self._start, target)
+        rewards = np.where(in_bounds, self._cell_rewards[self._rows, target[:, 0], target[:, 1]], self._out_of_bounds)
+        if self._potentials is not None:
+            # Same operation order as Environment._compile_transitions
+            next_potential = self._potentials[self._rows, next_positions[:, 0], next_positions[:, 1]]
+            rewards = rewards + np.where(goal, 0.0, self._shaping_gamma * next_potential) \
+                - self._potentials[self._rows, self.positions[:, 0], self.positions[:, 1]]
+
+        next_states = self._to_states(next_positions)
+        self.episode_steps += 1
+        self.truncated = ~goal & (self.episode_steps >= self._max_steps)
+        finished = goal | self.truncated
+        next_positions[finished] = self._start[finished]  # Auto-reset finished sub-environments
+        self.episode_steps[finished] = 0
+        self.positions = next_positions
+        return next_states, rewards, goal
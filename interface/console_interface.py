@@ -1,14 +1,24 @@
-import ast
+import sqlite3
 
 from config.config import DEFAULT_CONFIG
-from environment.agent import QLearningAgent, SarsaAgent
-from environment.rl_environment import Environment
+
+# NumPy, the environment, the agents and the policy store are imported by the menu entries that use them, so the
+# menu shows up without loading them
 
 
 class ConsoleInterface:
     def __init__(self, db_manager, username):
         self.db_manager = db_manager
         self.username = username
+        self._policy_cache = None
+
+    @property
+    def policy_cache(self):
+        """PolicyCache of trained Q-tables, created on first use."""
+        if self._policy_cache is None:
+            from database.policy_store import PolicyCache, PolicyStore
+            self._policy_cache = PolicyCache(PolicyStore(self.db_manager), DEFAULT_CONFIG['policy_cache_bytes'])
+        return self._policy_cache
 
     def run(self):
         while True:
@@ -45,6 +55,7 @@ class ConsoleInterface:
                 print(f"Invalid input. Please enter a valid {value_type.__name__}.")
 
     def create_environment(self):
+        from environment.rl_environment import ACTION_SETS, Environment
         print("Create a New Environment")
 
         while True:
@@ -59,10 +70,11 @@ class ConsoleInterface:
             # obstacles = self.get_input(prompt=f"Enter obstacle positions (e.g. [0 2] [3 1])",
             # default_value=None, value_type=tuple)
             rewards = DEFAULT_CONFIG['rewards']
-            action_space = DEFAULT_CONFIG['action_space']
-            # extra_actions = input("Enter extra possible actions except [up, down, left, right] "
-            #                        "(possible actions to be added: jump diagonal): ").split()
-            # action_space.extend([f"{extra} {action}" for action in action_space for extra in extra_actions])
+            action_set = input(f"Enter action set ({', '.join(ACTION_SETS)}) (default: basic): ").strip()
+            action_space = ACTION_SETS.get(action_set or 'basic')
+            if action_space is None:
+                print(f"Unknown action set '{action_set}', using up, down, left and right.")
+                action_space = DEFAULT_CONFIG['action_space']
             env_data = {
                 "board_size": board_size,
                 "obstacle_count": obstacle_count,
@@ -99,29 +111,44 @@ class ConsoleInterface:
 
     @staticmethod
     def _show_results(env, index=0):
+        environment_id, creator, rows, cols, obstacle_count, start_row, start_col, end_row, end_col = env
+        print(
+            f"{index + 1}: "
+            f"Creator: {creator}, "
+            f"Board Size: {(rows, cols)}, "
+            f"Obstacles: {obstacle_count}, "
+            f"Start: {(start_row, start_col)}, "
+            f"End: {(end_row, end_col)} ")
+
+    def _retrieve_environments(self):
+        """
+        Ask whether to list all environments or only the user's, then fetch them.
+        """
+        while True:
+            user_input = input("Do you want to retrieve all environments? (y/n): ").strip().lower()
+            if user_input in ['y', 'n', '']:
+                break
+            print("Invalid input. Please enter 'y' for all environments or 'n' for only your environments.")
+
         try:
-            print(
-                f"{index + 1}: "
-                f"Creator: {env[1]}, "
-                f"Board Size: {env[2]}, "
-                f"Obstacles: {env[3]}, "
-                f"Start: {env[5]}, "
-                f"End: {env[6]} ")
-        except IndexError:
-            print(
-                f"{index + 1}: "
-                f"Creator: {env[1]}, "
-                f"Board Size: {env[2]}, "
-                f"Obstacles: {env[3]}, "
-                f"Start: {env[4]}, "
-                f"End: {env[5]} ")
+            environments = self.db_manager.get_environments(username=self.username if user_input == 'n' else None)
+        except sqlite3.Error as e:
+            print(f"Database error occurred: {e}")
+            return []
+        if not environments:
+            print("No environments found.")
+        return environments
 
     def run_test_simulation(self):
         """
         Allow the user to pick an environment and run the Q-Learning agent on it after training.
         """
+        from database.policy_store import policy_key
+        from environment.agent import (DynaQAgent, PlanningAgent, QLambdaAgent, QLearningAgent, SarsaAgent,
+                                       SarsaLambdaAgent)
+        from environment.early_stopping import EarlyStopping
         print("Retrieving environments...")
-        environments = self.db_manager.get_user_environments(self.username)
+        environments = self._retrieve_environments()
 
         if not environments:
             print("You do not have any environments created yet. Please create one first.")
@@ -132,7 +159,8 @@ class ConsoleInterface:
         for index, env in enumerate(environments):
             try:
                 print(
-                    f"{index + 1}: Board Size: {env[2]}, Obstacles: {env[4]}, Start: {env[5]}, End: {env[6]}, Number of wins: {env[8]}"
+                    f"{index + 1}: Board Size: {env.board_size}, Obstacles: {env.obstacle_count}, Start: {env.start}, "
+                    f"End: {env.end}, Number of wins: {env.play_count}"
                 )
             except Exception as e:
                 print(f"Error displaying environment {index + 1}: {e}")
@@ -144,33 +172,11 @@ class ConsoleInterface:
 
             if 0 <= selected_index < len(environments):
                 selected_env = environments[selected_index]
-                environment_id = selected_env[0]  # Correct environment ID from the database
-
-                # Safely parse the obstacles
-                try:
-                    obstacles = selected_env[4]
-                    if isinstance(obstacles, str):
-                        obstacles = ast.literal_eval(obstacles)
-                    if not isinstance(obstacles, (set, list, tuple)):
-                        raise ValueError("Parsed obstacles are not in a valid format.")
-                except (ValueError, SyntaxError) as e:
-                    print(f"Error parsing obstacles: {e}")
-                    return
-
-                # print("Board size: ", tuple(map(int, selected_env[2].strip("()").split(","))))
-                # print("Obstacles: ", obstacles)
-                # print("start: ", tuple(map(int, selected_env[5].strip("()").split(","))))
-                # print("end: ", tuple(map(int, selected_env[6].strip("()").split(","))))
+                environment_id = selected_env.environment_id  # Correct environment ID from the database
 
-                # Initialize the selected environment
+                # Decode the stored layout into an environment
                 try:
-                    env = Environment(
-                        board_size=tuple(map(int, selected_env[2].strip("()").split(","))),
-                        obstacle_count=len(obstacles),
-                        start=tuple(map(int, selected_env[5].strip("()").split(","))),
-                        end=tuple(map(int, selected_env[6].strip("()").split(","))),
-                        obstacles=obstacles,
-                    )
+                    env = selected_env.to_environment()
                 except Exception as e:
                     print(f"Error initializing the environment: {e}")
                     return
@@ -181,20 +187,48 @@ class ConsoleInterface:
                 action_space_size = len(env.action_space)
                 print(f"Action space size: {action_space_size}")
                 while True:
-                    algorithm_index = int(input("Input 1 for Q-Learning or 2 for SARSA: "))
+                    algorithm_index = int(input("Input 1 for Q-Learning, 2 for SARSA, 3 for Planning "
+                                                "(value iteration), 4 for Q(lambda), 5 for SARSA(lambda) "
+                                                "or 6 for Dyna-Q: "))
                     if algorithm_index == 1:
                         agent = QLearningAgent(state_space_size, action_space_size)
                         break
                     elif algorithm_index == 2:
                         agent = SarsaAgent(state_space_size, action_space_size)
                         break
+                    elif algorithm_index == 3:
+                        agent = PlanningAgent(state_space_size, action_space_size)
+                        break
+                    elif algorithm_index == 4:
+                        agent = QLambdaAgent(state_space_size, action_space_size)
+                        break
+                    elif algorithm_index == 5:
+                        agent = SarsaLambdaAgent(state_space_size, action_space_size)
+                        break
+                    elif algorithm_index == 6:
+                        agent = DynaQAgent(state_space_size, action_space_size)
+                        break
                     else:
-                        print("Invalid selection. Please input 1 or 2")
-
-                # Train the agent silently
-                print(f"Training the agent on environment ID {environment_id}...")
-                agent.train(env)
-                print("Training complete.")
+                        print("Invalid selection. Please input a number from 1 to 6")
+
+                # Reuse a stored Q-table for this layout and configuration, otherwise train the agent silently
+                key = policy_key(environment_id, agent)
+                fingerprint = env.fingerprint()
+                q_table = self.policy_cache.get(key, fingerprint)
+                if q_table is not None:
+                    agent.q_table = q_table
+                    print(f"Loaded the trained agent for environment ID {environment_id}.")
+                else:
+                    print(f"Training the agent on environment ID {environment_id}...")
+                    early_stopping = EarlyStopping(rollout_every=50)
+                    agent.train(env, early_stopping=early_stopping)
+                    # Either reason means a greedy rollout reached the goal
+                    if early_stopping.reason == 'optimal':
+                        print(f"Training converged to a shortest path after {early_stopping.episodes} episodes.")
+                    elif early_stopping.reason == 'stable':
+                        print(f"Training converged after {early_stopping.episodes} episodes.")
+                    print("Training complete.")
+                    self.policy_cache.put(key, fingerprint, agent.q_table)
                 print(agent)
                 # Run the test simulation
                 print(f"Running test simulation on the selected environment with ID {environment_id}...\n")
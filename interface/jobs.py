@@ -0,0 +1,156 @@
+"""
+Train-and-evaluate jobs run on a bounded process pool, so web request handlers never block on training.
+"""
+import itertools
+import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from environment.agent import AGENTS
+from environment.instrumentation import TrainingCallback
+from environment.rl_environment import Environment
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when the configured number of active jobs is reached."""
+
+
+class _JobProgress(TrainingCallback):
+    """
+    Publishes training progress of a job to the shared progress dict, about once per percent of the episodes.
+    """
+
+    def __init__(self, progress, job_id):
+        self.progress = progress
+        self.job_id = job_id
+        self.total_episodes = 1
+        self.every = 1
+
+    def on_train_begin(self, agent, env, total_episodes):
+        self.total_episodes = max(1, total_episodes)
+        self.every = max(1, total_episodes // 100)
+
+    def on_episode_end(self, record):
+        if (record.episode + 1) % self.every == 0:
+            # Training is the first 90% of a job, evaluation the rest
+            self.progress[self.job_id] = ('training', 0.9 * (record.episode + 1) / self.total_episodes)
+
+
+def _run_job(job_id, progress, layout, algorithm, params, total_episodes, seed):
+    """
+    Worker-side job body: train the agent on the layout, then evaluate its greedy policy.
+    """
+    board_size, obstacles, start, end, moves = layout
+    env = Environment(board_size=board_size, obstacle_count=len(obstacles), start=start, end=end,
+                      obstacles=obstacles, action_space=moves)
+    agent = AGENTS[algorithm](board_size[0] * board_size[1], len(env.action_space), **params)
+    progress[job_id] = ('training', 0.0)
+    started = time.perf_counter()
+    agent.train(env, total_episodes=total_episodes, seed=seed, callbacks=[_JobProgress(progress, job_id)])
+    wall_time = time.perf_counter() - started
+    progress[job_id] = ('evaluating', 0.9)
+    return env.evaluate(agent), wall_time
+
+
+class JobManager:
+    """
+    Accepts jobs up to max_pending queued or running at once and runs at most max_workers of them in parallel.
+    Finished jobs write one row to the results table and stay queryable until max_finished newer ones finish.
+    """
+
+    def __init__(self, db_manager, max_workers=2, max_pending=32, max_finished=1000):
+        self.db_manager = db_manager
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._progress = None
+
+    def _start_pool(self):
+        # Started on the first job so importing the web interface does not spawn processes
+        if self._executor is None:
+            self._progress = multiprocessing.Manager().dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, environment_id, algorithm, params=None, total_episodes=None, seed=None, username=None):
+        """
+        Queue a train-and-evaluate job and return its id. Raises KeyError for an unknown environment,
+        ValueError for an unknown algorithm and JobQueueFull when too many jobs are active.
+        """
+        if algorithm not in AGENTS:
+            raise ValueError(f"Unknown algorithm '{algorithm}', use one of {sorted(AGENTS)}.")
+        params = dict(params or {})
+        env = self.db_manager.load_environment(environment_id)
+        if env is None:
+            raise KeyError(environment_id)
+        layout = (tuple(env.board_size), set(env.obstacles), tuple(env.start), tuple(env.end), env.moves.tolist())
+
+        with self._lock:
+            if self._active >= self.max_pending:
+                raise JobQueueFull(f"{self._active} jobs are already queued or running.")
+            self._start_pool()
+            job_id = next(self._ids)
+            self._active += 1
+            job = {
+                'id': job_id,
+                'environment_id': environment_id,
+                'algorithm': algorithm,
+                'params': params,
+                'username': username,
+                'status': 'queued',
+                'progress': 0.0,
+                'result': None,
+                'error': None,
+            }
+            self._jobs[job_id] = job
+            self._progress[job_id] = ('queued', 0.0)
+            future = self._executor.submit(_run_job, job_id, self._progress, layout, algorithm, params,
+                                           total_episodes, seed)
+        future.add_done_callback(lambda done: self._finish(job, done))
+        return job_id
+
+    def _finish(self, job, future):
+        try:
+            result, wall_time = future.result()
+        except Exception as e:
+            job.update(status='failed', error=str(e))
+        else:
+            steps = result['min_steps']
+            self.db_manager.store_result(job['environment_id'], steps, 1 if steps is not None else 0,
+                                         job['username'], job['algorithm'],
+                                         json.dumps(job['params'], sort_keys=True), wall_time)
+            job.update(status='done', progress=1.0, result=dict(result, wall_time=wall_time))
+        finally:
+            self._progress.pop(job['id'], None)
+            with self._lock:
+                self._active -= 1
+                finished = [job_id for job_id, entry in self._jobs.items() if entry['status'] in ('done', 'failed')]
+                for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                    del self._jobs[job_id]
+
+    def status(self, job_id):
+        """
+        Return a snapshot of the job as a dict, or None for an unknown id.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+        if snapshot['status'] == 'queued':
+            phase, progress = self._progress.get(job_id, ('queued', 0.0))
+            if phase != 'queued':
+                snapshot.update(status='running', phase=phase, progress=progress)
+        return snapshot
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -1,38 +1,162 @@
 from bottle import Bottle, run, request, response
-from environment.rl_environment import Environment
+from config.config import DEFAULT_CONFIG
+from environment.generator import generate_environments
+from environment.rl_environment import Environment, compile_action_space
 from database.db_manager import DatabaseManager
+from interface.jobs import JobManager, JobQueueFull
+
+# Largest batch one POST /environment/bulk request may generate
+MAX_BULK_ENVIRONMENTS = 100000
 
 app = Bottle()
 db_manager = DatabaseManager("environment_data.db")
+job_manager = JobManager(db_manager, max_workers=DEFAULT_CONFIG['job_workers'],
+                         max_pending=DEFAULT_CONFIG['job_queue_limit'])
+
+
+@app.hook('after_request')
+def release_connection():
+    # Request threads hand their connection back so the next request can reuse it
+    db_manager.release_connection()
 
 
 @app.route('/environment/create', method='POST')
 def create_environment():
-    data = request.json
-    board_size = data.get('board_size', (10, 10))
+    data = request.json or {}
+    board_size = data.get('board_size', [10, 10])
     obstacle_count = data.get('obstacle_count', 5)
-    start = data.get('start', (0, 0))
-    end = data.get('end', (board_size[0] - 1, board_size[1] - 1))
-
-    # Create the environment
-    env = Environment(board_size, obstacle_count, start, end)
-    db_manager.store_environment({
-        "board_size": board_size,
-        "obstacle_count": obstacle_count,
-        "start": start,
-        "end": end
-    })
+    start = data.get('start', [0, 0])
+    end = data.get('end')
+    error = _create_error(board_size, obstacle_count, start, end)
+    if error is not None:
+        response.status = 400
+        return {"status": "error", "message": error[0], "field": error[1]}
+    board_size, start = tuple(board_size), tuple(start)
+    end = tuple(end) if end is not None else (board_size[0] - 1, board_size[1] - 1)
+
+    # action_space takes action names and/or [row, col] move vectors
+    action_space = data.get('action_space')
+    if action_space is not None:
+        try:
+            compile_action_space(action_space)
+        except (TypeError, ValueError) as e:
+            response.status = 400
+            return {"status": "error", "message": str(e), "field": "action_space"}
+
+    env = Environment(board_size, obstacle_count, start, end, action_space=action_space)
+    validation_error, invalid_variable = env.validate()
+    if validation_error:
+        response.status = 400
+        return {"status": "error", "message": validation_error, "field": invalid_variable}
+    db_manager.store_environment(env, data.get('username'))
 
     return {"status": "success", "message": "Environment created"}
 
 
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_point(value):
+    return isinstance(value, list) and len(value) == 2 and all(_is_int(coordinate) for coordinate in value)
+
+
+def _create_error(board_size, obstacle_count, start, end):
+    """
+    Check the arguments of POST /environment/create that Environment needs before it can be built; returns
+    (message, field) for the first bad one, else None. Bounds and solvability are left to Environment.validate.
+    """
+    if not _is_point(board_size) or not all(side > 0 for side in board_size):
+        return "board_size must be a [rows, cols] pair of positive integers", 'board_size'
+    if not _is_int(obstacle_count) or obstacle_count < 0:
+        return "obstacle_count must be a non-negative integer", 'obstacle_count'
+    if not _is_point(start):
+        return "start must be a [row, col] pair of integers", 'start'
+    if end is not None and not _is_point(end):
+        return "end must be a [row, col] pair of integers", 'end'
+    return None
+
+
+def _bulk_error(count, sizes, densities, seed):
+    """
+    Check the arguments of POST /environment/bulk; returns (message, field) for the first bad one, else None.
+    """
+    if not _is_int(count) or not 0 < count <= MAX_BULK_ENVIRONMENTS:
+        return f"count must be between 1 and {MAX_BULK_ENVIRONMENTS}", 'count'
+    max_side = DEFAULT_CONFIG['max_bulk_board_side']
+    if not isinstance(sizes, list) or not sizes or not all(
+            isinstance(size, list) and len(size) == 2 and all(_is_int(side) and 0 < side <= max_side for side in size)
+            for size in sizes):
+        return f"sizes must be a non-empty list of [rows, cols] pairs of integers between 1 and {max_side}", 'sizes'
+    if not isinstance(densities, list) or not densities or not all(
+            isinstance(density, (int, float)) and not isinstance(density, bool) and 0 <= density < 1
+            for density in densities):
+        return "densities must be a non-empty list of numbers in [0, 1)", 'densities'
+    if seed is not None and not (_is_int(seed) and seed >= 0):
+        return "seed must be a non-negative integer", 'seed'
+    return None
+
+
+@app.route('/environment/bulk', method='POST')
+def create_environments():
+    """
+    Generate and store many environments at once, e.g.
+    {"count": 1000, "sizes": [[10, 10], [20, 20]], "densities": [0.1, 0.2], "seed": 7}.
+    """
+    data = request.json or {}
+    count, sizes = data.get('count', 100), data.get('sizes', [[10, 10]])
+    densities, seed = data.get('densities', [0.1]), data.get('seed')
+    error = _bulk_error(count, sizes, densities, seed)
+    if error is not None:
+        response.status = 400
+        return {"status": "error", "message": error[0], "field": error[1]}
+    layouts = generate_environments(count, sizes=sizes, densities=densities, seed=seed)
+    db_manager.store_layouts(layouts, data.get('username'))
+    return {"status": "success", "created": len(layouts), "rejected": count - len(layouts)}
+
+
+@app.route('/jobs', method='POST')
+def create_job():
+    """
+    Start a train-and-evaluate job, e.g. {"environment_id": 3, "algorithm": "sarsa", "params": {"gamma": 0.9}}.
+    """
+    data = request.json or {}
+    try:
+        job_id = job_manager.submit(data['environment_id'], data.get('algorithm', 'q_learning'),
+                                    params=data.get('params'), total_episodes=data.get('episodes'),
+                                    seed=data.get('seed'), username=data.get('username'))
+    except JobQueueFull as e:
+        response.status = 429
+        return {"status": "error", "message": str(e)}
+    except KeyError as e:
+        response.status = 404 if 'environment_id' in data else 400
+        return {"status": "error", "message": f"Unknown environment {e}" if 'environment_id' in data
+                else "environment_id is required"}
+    except ValueError as e:
+        response.status = 400
+        return {"status": "error", "message": str(e)}
+    response.status = 202
+    return {"status": "success", "job_id": job_id}
+
+
+@app.route('/jobs/<job_id:int>', method='GET')
+def get_job(job_id):
+    job = job_manager.status(job_id)
+    if job is None:
+        response.status = 404
+        return {"status": "error", "message": f"Unknown job {job_id}"}
+    return {"status": "success", "job": job}
+
+
 @app.route('/environment/test_run', method='POST')
 def run_test_simulation():
-    env = Environment()
-    # Run a simple test simulation (replace this with actual agent simulation if needed)
-    result = {"status": "success", "data": "Test simulation complete"}
-    return result
+    # Training is too slow for a request handler; run it as a job and let the client poll /jobs/<id>
+    return create_job()
 
 
 if __name__ == "__main__":
-    run(app, host='localhost', port=8080)
+    try:
+        run(app, host='localhost', port=8080)
+    finally:
+        job_manager.shutdown(wait=False)
+        db_manager.close()
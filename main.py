@@ -1,28 +1,18 @@
-import msvcrt
-import os
+import getpass
 
-from interface.console_interface import ConsoleInterface
 from database.db_manager import DatabaseManager
 
 
+def run_console(db_manager, username):
+    # Imported after login so the menu shows up without loading NumPy, the agents or the renderers
+    from interface.console_interface import ConsoleInterface
+    ConsoleInterface(db_manager, username).run()
+
+
 def main():
     def password_input(prompt="Enter your password: "):
-        password = ""
-        if os.name == 'nt':  # Windows
-            print(prompt, end="", flush=True)
-            while True:
-                char = msvcrt.getch()
-                if char == b'\r' and len(password) > 4:  # Enter key
-                    break
-                elif char == b'\x08':  # Backspace key
-                    if len(password) > 0:
-                        password = password[:-1]
-                        print("\b \b", end="", flush=True)
-                else:
-                    password += char.decode("utf-8")
-                    print("*", end="", flush=True)
-        print()
-        return password
+        # getpass hides the typed password on every platform
+        return getpass.getpass(prompt)
 
     db_manager = DatabaseManager("environment_data.db")
     # db_manager.drop_all_tables()
@@ -42,8 +32,7 @@ def main():
                     password = password_input()
                     db_manager.add_user(username, password)
                     print("Registration successful!")
-                    interface = ConsoleInterface(db_manager, username)
-                    interface.run()
+                    run_console(db_manager, username)
                     check = False
                     break
         elif choice == "2":
@@ -57,8 +46,7 @@ def main():
                 password = password_input(prompt="Enter password: ")
                 if db_manager.verify_password(username, password):
                     print("Login successful!")
-                    interface = ConsoleInterface(db_manager, username)
-                    interface.run()
+                    run_console(db_manager, username)
                     check = False
                     break
                 else:
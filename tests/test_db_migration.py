@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+from database.db_manager import SCHEMA_VERSION, DatabaseManager
+
+# Schema of the first release, before PRAGMA user_version was set
+BASELINE_SCHEMA = (
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password BLOB,
+        env_num INTEGER DEFAULT 0
+    );""",
+    """CREATE TABLE environments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT,
+        board_size TEXT,
+        obstacle_count INTEGER,
+        obstacle_position TEXT,
+        start TEXT,
+        end TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    """CREATE TABLE results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        board_id INTEGER,
+        actions_taken INTEGER,
+        reward INTEGER DEFAULT 0,
+        player_username TEXT,
+        played_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (board_id) REFERENCES environments (id) ON DELETE CASCADE
+    );""",
+)
+
+# (username, board_size, obstacles, start, end) as the first release stored them, with str()
+BASELINE_ENVIRONMENTS = [
+    ('alice', (5, 5), {(1, 1), (2, 3), (4, 0)}, (0, 0), (4, 4)),
+    ('bob', (3, 7), set(), (0, 6), (2, 0)),
+    ('alice', (8, 4), {(7, 3), (0, 1)}, (0, 0), (7, 0)),
+    ('carol', (2, 2), {(1, 0)}, (0, 0), (1, 1)),
+]
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    connection = sqlite3.connect(path)
+    with connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(statement)
+        for username, board_size, obstacles, start, end in BASELINE_ENVIRONMENTS:
+            connection.execute("INSERT INTO environments (username, board_size, obstacle_count, obstacle_position, "
+                               "start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                               (username, str(board_size), len(obstacles), str(obstacles), str(start), str(end)))
+        connection.executemany("INSERT INTO results (board_id, actions_taken, reward, player_username) "
+                               "VALUES (?, ?, ?, ?)", [(1, 8, 1, 'bob'), (1, 12, 0, 'carol'), (3, 10, 1, 'alice')])
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def migrated(baseline_db):
+    db_manager = DatabaseManager(baseline_db)
+    yield db_manager
+    db_manager.close()
+
+
+def test_migration_sets_schema_version(migrated):
+    assert migrated.connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = {row[1] for row in migrated.connection.execute("PRAGMA table_info(environments)")}
+    assert {'rows', 'cols', 'obstacles', 'play_count', 'moves'} <= columns
+    assert not {'board_size', 'obstacle_position', 'start', 'end'} & columns
+    assert {row[1] for row in migrated.connection.execute("PRAGMA table_info(results)")} >= \
+        {'algorithm', 'params', 'wall_time'}
+
+
+def test_migration_keeps_rows_and_decodes_obstacles(migrated):
+    rows = {row.environment_id: row for row in migrated.get_environments()}
+    assert sorted(rows) == [1, 2, 3, 4]
+    for environment_id, (username, board_size, obstacles, start, end) in enumerate(BASELINE_ENVIRONMENTS, 1):
+        row = rows[environment_id]
+        assert (row.creator, row.board_size, row.obstacle_count, row.start, row.end) == \
+            (username, board_size, len(obstacles), start, end)
+        assert row.moves is None
+        env = migrated.load_environment(environment_id)
+        assert set(env.obstacles) == obstacles
+        assert (tuple(env.board_size), tuple(env.start), tuple(env.end)) == (board_size, start, end)
+        assert set(row.to_environment().obstacles) == obstacles
+
+
+def test_migration_counts_plays_and_keeps_them_current(migrated):
+    def play_counts():
+        return {row.environment_id: row.play_count for row in migrated.get_environments()}
+
+    assert play_counts() == {1: 2, 2: 0, 3: 1, 4: 0}
+    migrated.store_results([(2, 5, 1, 'alice', None, None, None), (2, 7, 0, 'bob', None, None, None)])
+    assert play_counts()[2] == 2
+    with migrated.connection:
+        migrated.connection.execute("DELETE FROM results WHERE board_id = 1 AND player_username = 'bob'")
+    assert play_counts()[1] == 1
+
+
+def test_migrated_listing_pages_by_keyset(migrated):
+    first = migrated.get_environments(limit=2)
+    assert [row.environment_id for row in first] == [4, 3]
+    second = migrated.get_environments(limit=2, after_id=first[-1].environment_id)
+    assert [row.environment_id for row in second] == [2, 1]
+    assert migrated.get_environments(limit=2, after_id=second[-1].environment_id) == []
+    alice = migrated.get_environments(username='alice', limit=1)
+    assert [row.environment_id for row in alice] == [3]
+    assert [row.environment_id for row in migrated.get_environments(username='alice', after_id=3)] == [1]
+
+
+def test_migration_runs_once(baseline_db):
+    DatabaseManager(baseline_db).close()
+    db_manager = DatabaseManager(baseline_db)
+    try:
+        assert [row.play_count for row in db_manager.get_environments()] == [0, 1, 0, 2]
+    finally:
+        db_manager.close()
@@ -0,0 +1,43 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from environment import rl_environment
+from environment.agent import QLearningAgent, SarsaAgent
+from environment.rl_environment import Environment
+
+
+def train_peak(agent_class, backend, side):
+    env = Environment((side, side), 0, (0, 0), (side - 1, side - 1), obstacles=set(),
+                      termination_conditions={'max_steps': 500})
+    agent = agent_class(side * side, len(env.action_space), sparse=True)
+    tracemalloc.start()
+    try:
+        agent.train(env, total_episodes=5, seed=0, backend=backend)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('agent_class', [QLearningAgent, SarsaAgent])
+def test_sparse_fast_backend_memory_follows_visited_states(agent_class):
+    # A full transition table of this board takes several hundred MB; the grids themselves take about 9 MB
+    peak = train_peak(agent_class, 'fast', 1000)
+    assert peak < 2 * train_peak(agent_class, 'reference', 1000)
+    assert peak < 50 * 2 ** 20
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+@pytest.mark.parametrize('agent_class', [QLearningAgent, SarsaAgent])
+def test_lazy_transition_rows_match_reference(agent_class, sparse, monkeypatch):
+    # A limit of 0 makes every board build its transition rows lazily
+    monkeypatch.setattr(rl_environment, 'STEP_LOOKUP_LIMIT', 0)
+    q_tables = []
+    for backend in ('reference', 'fast'):
+        env = Environment((5, 6), 4, (0, 0), (4, 5), obstacles={(1, 1), (1, 2), (3, 3), (2, 4)},
+                          rewards={'step': -0.05, 'cells': {(0, 5): 0.3}, 'shaping': 'manhattan'})
+        agent = agent_class(30, len(env.action_space), sparse=sparse)
+        agent.train(env, total_episodes=200, seed=4, backend=backend)
+        q_tables.append(np.array([agent.q_table[state, :] for state in range(30)]))
+    assert np.array_equal(*q_tables)
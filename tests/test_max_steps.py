@@ -0,0 +1,58 @@
+import pytest
+
+from environment.agent import QLearningAgent, SarsaAgent
+from environment.rl_environment import Environment
+
+
+def make_env(max_steps):
+    # The goal is 18 steps away, so no episode of fewer steps can reach it
+    return Environment((10, 10), 0, (0, 0), (9, 9), obstacles=set(),
+                       termination_conditions={'goal_reached': False, 'max_steps': max_steps})
+
+
+class WallAgent:
+    """Always walks up into the top edge, so it never reaches the goal."""
+
+    def select_action(self, state):
+        return 0
+
+
+def test_step_reports_done_when_the_budget_is_spent():
+    env = make_env(7)
+    env.reset()
+    results = [env.step('up') for _ in range(7)]
+    assert [done for _, _, done in results] == [False] * 6 + [True]
+    assert env.truncated
+    assert env.episode_steps == 7
+
+    env.reset()
+    assert not env.truncated
+    assert env.step_index(0)[2] is False
+
+
+def test_agent_that_never_reaches_the_goal_stops_after_max_steps():
+    env = make_env(12)
+    state, steps, done = env.reset(), 0, False
+    while not done:
+        state, reward, done = env.step_index(WallAgent().select_action(state))
+        steps += 1
+        assert steps <= 12
+    assert steps == 12 and env.truncated
+    assert env.evaluate(WallAgent())['successes'] == 0
+
+
+@pytest.mark.parametrize('agent_class', [QLearningAgent, SarsaAgent])
+@pytest.mark.parametrize('backend', ['reference', 'fast'])
+def test_training_episodes_end_at_max_steps(agent_class, backend):
+    env = make_env(5)
+    agent = agent_class(100, 4)
+    agent.train(env, total_episodes=3, max_steps_per_episode=1000, seed=0, backend=backend)
+    assert agent.steps_trained == 15
+
+
+def test_reaching_the_goal_on_the_last_step_is_not_truncated():
+    env = Environment((2, 2), 0, (0, 0), (0, 1), obstacles=set(),
+                      termination_conditions={'goal_reached': False, 'max_steps': 1})
+    env.reset()
+    assert env.step('right') == (1, 1, True)
+    assert not env.truncated
@@ -0,0 +1,24 @@
+import pytest
+
+from environment.rl_environment import Environment
+
+
+def make_env(rewards):
+    return Environment((5, 5), 0, (0, 0), (4, 4), obstacles=set(), rewards=rewards)
+
+
+def test_unknown_reward_keys_are_rejected():
+    env = make_env({'gaol': 5, 'step': -1})
+    message, field = env.validate()
+    assert field == 'rewards' and "'gaol'" in message
+    with pytest.raises(ValueError, match="Unknown reward 'gaol'"):
+        env.reward_model()
+    with pytest.raises(ValueError, match="Unknown reward 'gaol'"):
+        env.fingerprint()
+
+
+def test_fingerprint_only_changes_for_non_default_rewards():
+    default = make_env(None).fingerprint()
+    assert make_env({'goal': 1, 'obstacle': -1, 'step': 0}).fingerprint() == default
+    assert make_env({'step': -1}).fingerprint() != default
+    assert make_env({'shaping': 'manhattan'}).fingerprint() != default
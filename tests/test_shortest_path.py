@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from environment.rl_environment import Environment
+
+
+def serpentine(rows, cols):
+    """Walls across every other row, open at alternating ends, so the only path winds through the whole board."""
+    obstacles = set()
+    for row in range(1, rows, 2):
+        gap = cols - 1 if row % 4 == 1 else 0
+        obstacles.update((row, col) for col in range(cols) if col != gap)
+    return obstacles
+
+
+def make_env(board_size, start, end, obstacles, action_space=None):
+    return Environment(board_size, len(obstacles), start, end, obstacles=obstacles, action_space=action_space)
+
+
+@pytest.mark.parametrize('board_size, start, end, obstacles, action_space, expected', [
+    ((3, 3), (0, 0), (2, 2), set(), None, 4),
+    ((3, 3), (0, 0), (2, 2), set(), ['up', 'down', 'left', 'right', 'up-left', 'up-right', 'down-left',
+                                     'down-right'], 2),
+    ((3, 3), (0, 0), (0, 0), set(), None, 0),
+    ((3, 4), (0, 0), (0, 3), {(0, 1), (1, 1)}, None, 7),
+    ((1, 7), (0, 0), (0, 6), set(), [(0, 3)], 2),
+    ((1, 7), (0, 0), (0, 6), set(), [(0, 4)], None),
+    ((2, 2), (0, 0), (1, 1), set(), [(0, 5), (1, 1)], 1),
+])
+def test_solvable_boards(board_size, start, end, obstacles, action_space, expected):
+    env = make_env(board_size, start, end, obstacles, action_space)
+    assert env.shortest_path_length() == expected
+    assert env.is_solvable() == (expected is not None)
+
+
+@pytest.mark.parametrize('board_size, start, end, obstacles', [
+    ((3, 3), (0, 0), (2, 2), {(0, 1), (1, 0)}),
+    ((4, 4), (0, 0), (3, 3), {(2, 0), (2, 1), (2, 2), (2, 3)}),
+    ((3, 3), (0, 0), (2, 2), {(2, 2)}),
+    ((3, 3), (0, 0), (3, 3), set()),
+])
+def test_blocked_boards(board_size, start, end, obstacles):
+    env = make_env(board_size, start, end, obstacles)
+    assert env.shortest_path_length() is None
+    assert not env.is_solvable()
+
+
+def test_serpentine_path_length():
+    rows, cols = 9, 5
+    env = make_env((rows, cols), (0, 0), (rows - 1, cols - 1), serpentine(rows, cols))
+    # Every open row is crossed end to end, with one step down through each gap
+    assert env.shortest_path_length() == (rows // 2 + 1) * (cols - 1) + rows - 1
+
+
+def test_long_serpentine_is_fast():
+    rows, cols = 401, 400
+    env = make_env((rows, cols), (0, 0), (rows - 1, cols - 1), serpentine(rows, cols))
+    started = time.perf_counter()
+    assert env.shortest_path_length() == (rows // 2 + 1) * (cols - 1) + rows - 1
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,70 @@
+from database.db_manager import DatabaseManager
+from environment.rl_environment import Environment
+from environment import sweep
+from environment.sweep import main, parse_grid, run_sweep
+
+
+def make_env():
+    return Environment((4, 4), 2, (0, 0), (3, 3), obstacles={(1, 1), (2, 2)})
+
+
+def make_shaped_env(max_steps):
+    return Environment((4, 4), 2, (0, 0), (3, 3), obstacles={(1, 1), (2, 2)},
+                       rewards={'step': -0.1, 'cells': {(0, 3): 0.5}, 'shaping': 'manhattan'},
+                       termination_conditions={'max_steps': max_steps})
+
+
+def test_parse_grid_keeps_value_types():
+    grid = parse_grid(['lr=0.1,0.2', 'planning_steps=2,4', 'prioritized=true,false', 'trace_type=accumulating'])
+    assert grid == {'learning_rate': [0.1, 0.2], 'planning_steps': [2, 4], 'prioritized': [True, False],
+                    'trace_type': ['accumulating']}
+    assert all(type(value) is int for value in grid['planning_steps'])
+
+
+def test_dyna_q_sweep_over_planning_steps():
+    grid = parse_grid(['planning_steps=2,4', 'queue_size=50', 'prioritized=false,true'])
+    runs, summary = run_sweep(make_env(), 'dyna_q', grid, seeds=2, total_episodes=30, workers=1)
+    assert len(runs) == 8
+    assert [row['params'] for row in summary] == [
+        {'planning_steps': steps, 'queue_size': 50, 'prioritized': prioritized}
+        for steps in (2, 4) for prioritized in (False, True)
+    ]
+    assert all(0.0 <= row['success_rate'] <= 1.0 for row in summary)
+
+
+def test_worker_rebuilds_rewards_and_max_steps(monkeypatch):
+    env = make_shaped_env(max_steps=5)
+    monkeypatch.setattr(sweep, '_worker_env', None)
+    sweep._init_worker(*sweep._worker_layout(env))
+    assert sweep._worker_env.fingerprint() == env.fingerprint()
+    assert sweep._worker_env.reward_model() == env.reward_model()
+    assert sweep._worker_env.max_steps == 5
+
+
+def test_sweep_respects_max_steps_of_shaped_environment():
+    # The shortest path takes 6 steps, so no run can reach the goal within 5
+    runs, summary = run_sweep(make_shaped_env(max_steps=5), 'q_learning', {}, seeds=2, total_episodes=200, workers=1)
+    assert [run[3] for run in runs] == [None, None]
+    assert summary[0]['success_rate'] == 0.0
+
+    runs, summary = run_sweep(make_shaped_env(max_steps=50), 'q_learning', {}, seeds=2, total_episodes=200,
+                              workers=1)
+    assert summary[0]['success_rate'] == 1.0
+
+
+def test_sweep_command_line_with_dyna_q(tmp_path, capsys):
+    db_name = str(tmp_path / "sweep.db")
+    db_manager = DatabaseManager(db_name)
+    db_manager.store_environment(make_env(), 'sweeper')
+    db_manager.close()
+
+    main(['--env-id', '1', '--algo', 'dyna_q', '--grid', 'planning_steps=2,4', '--seeds', '1', '--episodes', '20',
+          '--workers', '1', '--db', db_name])
+    assert "2 runs in" in capsys.readouterr().out
+
+    db_manager = DatabaseManager(db_name)
+    try:
+        rows = db_manager.connection.execute("SELECT algorithm, params FROM results ORDER BY id").fetchall()
+    finally:
+        db_manager.close()
+    assert rows == [('dyna_q', '{"planning_steps": 2}'), ('dyna_q', '{"planning_steps": 4}')]
@@ -0,0 +1,98 @@
+import pytest
+
+from environment import rl_environment
+from environment.rl_environment import Environment, _GridStepLookup
+
+ACTIONS = ['up', 'down', 'left', 'right']
+
+LAYOUTS = {
+    'open': ((3, 3), (0, 0), (2, 2), set()),
+    'corridor': ((1, 6), (0, 0), (0, 5), {(0, 3)}),
+    'walls': ((5, 4), (4, 0), (0, 3), {(1, 1), (1, 2), (1, 3), (3, 0), (3, 1), (2, 3)}),
+    'goal_in_middle': ((4, 5), (0, 4), (2, 2), {(2, 1), (1, 2), (3, 3)}),
+}
+
+
+def baseline_step(env, position, action):
+    """The step() of the first release: (next_position, reward, done) for one move."""
+    row_offset, col_offset = {'up': (-1, 0), 'down': (1, 0), 'left': (0, -1), 'right': (0, 1)}[action]
+    target = (position[0] + row_offset, position[1] + col_offset)
+    if not (0 <= target[0] < env.board_size[0] and 0 <= target[1] < env.board_size[1]):
+        return position, -1, False
+    if target in env.obstacles:
+        return env.start, -1, False
+    if target == env.end:
+        return target, 1, True
+    return target, 0, False
+
+
+def make_env(name):
+    board_size, start, end, obstacles = LAYOUTS[name]
+    return Environment(board_size, len(obstacles), start, end, obstacles=set(obstacles))
+
+
+def expected_transitions(env):
+    rows, cols = env.board_size
+    for row in range(rows):
+        for col in range(cols):
+            if (row, col) in env.obstacles:
+                continue
+            for action_index, action in enumerate(ACTIONS):
+                next_position, reward, done = baseline_step(env, (row, col), action)
+                yield env.state_to_index((row, col)), action_index, action, \
+                    (env.state_to_index(next_position), reward, done)
+
+
+@pytest.mark.parametrize('name', sorted(LAYOUTS))
+def test_transition_table_matches_baseline_step(name):
+    env = make_env(name)
+    table = env.transition_table()
+    for state, action_index, action, expected in expected_transitions(env):
+        assert (int(table.next_state[state, action_index]), int(table.reward[state, action_index]),
+                bool(table.done[state, action_index])) == expected
+
+
+@pytest.mark.parametrize('use_grid_lookup', [False, True])
+@pytest.mark.parametrize('name', sorted(LAYOUTS))
+def test_step_and_step_index_match_baseline_step(name, use_grid_lookup, monkeypatch):
+    if use_grid_lookup:
+        # Every board is above a limit of 0, so step_index answers from _GridStepLookup
+        monkeypatch.setattr(rl_environment, 'STEP_LOOKUP_LIMIT', 0)
+    env = make_env(name)
+    for state, action_index, action, expected in expected_transitions(env):
+        for step, key in ((env.step_index, action_index), (env.step, action)):
+            env.reset()
+            env.current_state = state
+            assert step(key) == expected
+            assert env.current_state == expected[0]
+    assert isinstance(env._step_lookup, _GridStepLookup) == use_grid_lookup
+
+
+@pytest.mark.parametrize('name', sorted(LAYOUTS))
+def test_grid_lookup_matches_compiled_table(name):
+    env = make_env(name)
+    env.rewards = {'step': -0.5, 'out_of_bounds': -2, 'cells': {(0, 1): 3}, 'shaping': 'manhattan',
+                   'shaping_gamma': 0.9}
+    table = env.transition_table()
+    lookup = _GridStepLookup(env)
+    action_count = len(env.action_space)
+    for index in range(table.next_state.size):
+        state, action_index = divmod(index, action_count)
+        assert lookup[index] == (int(table.next_state[state, action_index]), table.reward[state, action_index].item(),
+                                 bool(table.done[state, action_index]))
+
+
+def test_episode_through_step_follows_baseline():
+    env = make_env('corridor')
+    env.termination_conditions = {'max_steps': 20}
+    env.reset()
+    # Out of bounds stays put, the obstacle sends the agent back to start, the goal ends the episode
+    assert env.step('up') == (0, -1, False)
+    assert env.step('right') == (1, 0, False)
+    assert env.step('right') == (2, 0, False)
+    assert env.step('right') == (0, -1, False)
+    env.obstacles = set()
+    for expected_state in (1, 2, 3, 4):
+        assert env.step('right') == (expected_state, 0, False)
+    assert env.step('right') == (5, 1, True)
+    assert not env.truncated
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from environment.rl_environment import ACTION_SETS, Environment
+from environment.vector_env import VectorEnvironment
+
+LAYOUTS = [
+    dict(board_size=(5, 6), start=(0, 0), end=(4, 5), obstacles={(1, 1), (2, 3), (3, 0), (0, 4)}),
+    dict(board_size=(4, 4), start=(3, 0), end=(0, 3), obstacles={(1, 2), (2, 1)},
+         rewards={'step': -0.1, 'shaping': 'manhattan', 'shaping_gamma': 0.9}),
+    dict(board_size=(5, 6), start=(2, 2), end=(0, 0), obstacles=set(), rewards={'cells': {(1, 1): 3}},
+         termination_conditions={'goal_reached': False, 'max_steps': 6}),
+]
+
+
+def make_envs(action_set):
+    return [Environment(obstacle_count=len(layout['obstacles']), action_space=ACTION_SETS[action_set], **layout)
+            for layout in LAYOUTS if layout['board_size'] == (5, 6)]
+
+
+@pytest.mark.parametrize('action_set', ['basic', 'diagonal'])
+def test_batch_matches_step_index_with_auto_reset(action_set):
+    envs = make_envs(action_set)
+    vector_env = VectorEnvironment(envs)
+    states = vector_env.reset()
+    assert states.tolist() == [env.reset() for env in envs]
+    rng = np.random.default_rng(0)
+    finished_goal = finished_truncated = 0
+    for _ in range(500):
+        actions = rng.integers(len(envs[0].action_space), size=len(envs))
+        next_states, rewards, dones = vector_env.step(actions)
+        for index, env in enumerate(envs):
+            state, reward, done = env.step_index(int(actions[index]))
+            truncated = env.truncated
+            assert (next_states[index], rewards[index]) == (state, reward)
+            # dones only marks the goal; running out of steps is reported through truncated
+            assert dones[index] == (done and not truncated)
+            assert vector_env.truncated[index] == truncated
+            if done:
+                finished_goal += not truncated
+                finished_truncated += truncated
+                env.reset()
+        assert vector_env._to_states(vector_env.positions).tolist() == [env.current_state for env in envs]
+    assert finished_goal and finished_truncated
+
+
+def test_shaped_rewards_match_step_index():
+    layout = LAYOUTS[1]
+    env = Environment(obstacle_count=len(layout['obstacles']), **layout)
+    vector_env = VectorEnvironment.from_environment(env, 1)
+    vector_env.reset()
+    env.reset()
+    for action in [0, 3, 3, 0, 1, 2, 3, 3, 0, 0, 3, 0]:
+        next_states, rewards, dones = vector_env.step([action])
+        state, reward, done = env.step_index(action)
+        assert (next_states[0], dones[0]) == (state, done and not env.truncated)
+        assert rewards[0] == reward
+        if done:
+            env.reset()